@@ -0,0 +1,52 @@
+-- Migration: case-insensitive unique emails (idx_users_email_lower)
+--
+-- Existing databases may hold accounts whose emails differ only in case, and
+-- the unique index cannot be built over them. For each lower(email) group the
+-- account that is active, most recently logged in and oldest is kept; the
+-- others are deactivated and their email is suffixed with '.dup-<id>' so no
+-- data is deleted and the rows can be reviewed or merged by hand afterwards.
+--
+-- Run once against an existing database before deploying the new schema:
+--   psql "$DATABASE_URL" -f database/migrations/001_users_email_lower_unique.sql
+
+BEGIN;
+
+-- Block concurrent registrations while duplicates are resolved
+LOCK TABLE users IN SHARE ROW EXCLUSIVE MODE;
+
+DO $$
+DECLARE
+    renamed INTEGER;
+BEGIN
+    WITH ranked AS (
+        SELECT id,
+               row_number() OVER (
+                   PARTITION BY lower(email)
+                   ORDER BY is_active DESC NULLS LAST,
+                            last_login DESC NULLS LAST,
+                            created_at ASC NULLS LAST,
+                            id
+               ) AS rank
+        FROM users
+    )
+    UPDATE users u
+    SET email = left(u.email, 200) || '.dup-' || u.id::text,
+        is_active = FALSE
+    FROM ranked r
+    WHERE u.id = r.id AND r.rank > 1;
+
+    GET DIAGNOSTICS renamed = ROW_COUNT;
+    IF renamed > 0 THEN
+        RAISE NOTICE 'Deactivated and renamed % case-duplicate user account(s)', renamed;
+    END IF;
+END
+$$;
+
+-- Renamed accounts must not keep live sessions
+DELETE FROM user_sessions s
+USING users u
+WHERE s.user_id = u.id AND u.email LIKE '%.dup-' || u.id::text;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_lower ON users(lower(email));
+
+COMMIT;
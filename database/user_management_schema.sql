@@ -31,7 +31,10 @@ CREATE TABLE IF NOT EXISTS users (
 );
 
 -- User sessions table
-CREATE TABLE IF NOT EXISTS user_sessions (
+-- UNLOGGED: no WAL for the per-login/logout writes. After a crash the table is
+-- truncated, so all sessions (auth API JWT sessions and the mobile API's
+-- UserSession tokens) are lost and users have to log in again
+CREATE UNLOGGED TABLE IF NOT EXISTS user_sessions (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     session_token VARCHAR(255) UNIQUE NOT NULL,
@@ -41,6 +44,9 @@ CREATE TABLE IF NOT EXISTS user_sessions (
     ip_address VARCHAR(45)
 );
 
+-- Existing databases: CREATE ... IF NOT EXISTS leaves an older logged table as is
+ALTER TABLE user_sessions SET UNLOGGED;
+
 -- Custom trading strategies table
 CREATE TABLE IF NOT EXISTS custom_strategies (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -152,9 +158,12 @@ CREATE TABLE IF NOT EXISTS user_trading_activity (
 
 -- Indexes for performance optimization
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+-- Existing databases: run migrations/001_users_email_lower_unique.sql first
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_lower ON users(lower(email));
 CREATE INDEX IF NOT EXISTS idx_users_verification_token ON users(email_verification_token);
 CREATE INDEX IF NOT EXISTS idx_users_reset_token ON users(password_reset_token);
-CREATE INDEX IF NOT EXISTS idx_user_sessions_token ON user_sessions(session_token);
+-- session_token lookups use the index behind its UNIQUE constraint
+DROP INDEX IF EXISTS idx_user_sessions_token;
 CREATE INDEX IF NOT EXISTS idx_user_sessions_user_id ON user_sessions(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_sessions_expires ON user_sessions(expires_at);
 CREATE INDEX IF NOT EXISTS idx_custom_strategies_user_id ON custom_strategies(user_id);
@@ -80,8 +80,17 @@ CREATE TABLE IF NOT EXISTS users (
 -- Create index on email for faster lookups
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 
+-- Case-insensitive uniqueness; serves the lower(email) lookups in register,
+-- login and password reset. Existing databases with case-duplicate emails must
+-- run database/migrations/001_users_email_lower_unique.sql first
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_lower ON users(lower(email));
+
 -- Create user_sessions table
-CREATE TABLE IF NOT EXISTS user_sessions (
+-- UNLOGGED: sessions are short-lived and recreated by logging in again, so the
+-- per-login INSERT and per-logout DELETE skip the WAL. After a crash the table
+-- is truncated: every session is lost, both the auth API's JWT sessions and the
+-- mobile API's UserSession tokens, and all users have to log in again
+CREATE UNLOGGED TABLE IF NOT EXISTS user_sessions (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     session_token VARCHAR(255) UNIQUE NOT NULL,
@@ -91,8 +100,11 @@ CREATE TABLE IF NOT EXISTS user_sessions (
     ip_address VARCHAR(45)
 );
 
--- Create index on session_token for faster lookups
-CREATE INDEX IF NOT EXISTS idx_user_sessions_token ON user_sessions(session_token);
+-- Existing databases: CREATE ... IF NOT EXISTS leaves an older logged table as is
+ALTER TABLE user_sessions SET UNLOGGED;
+
+-- session_token lookups use the index behind its UNIQUE constraint
+DROP INDEX IF EXISTS idx_user_sessions_token;
 
 -- Create email_verifications table for temporary storage of verification codes
 CREATE TABLE IF NOT EXISTS email_verifications (
@@ -112,6 +124,10 @@ CREATE TABLE IF NOT EXISTS temp_registrations (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Indexes for the periodic purge of expired verification and registration rows
+CREATE INDEX IF NOT EXISTS idx_email_verifications_expires ON email_verifications(expires_at);
+CREATE INDEX IF NOT EXISTS idx_temp_registrations_created ON temp_registrations(created_at);
+
 -- Create custom_strategies table
 CREATE TABLE IF NOT EXISTS custom_strategies (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
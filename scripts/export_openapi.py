@@ -6,15 +6,27 @@ Usage:
   python scripts/export_openapi.py [--out openapi/openapi.json]
 
 Notes:
-  - This imports the FastAPI app via TradingDashboardServer but does not start the server.
+  - The schema is built from a bare FastAPI app with only the API routers registered,
+    so no TradingDashboardServer (signal generator, Binance stream, DB managers) is constructed.
   - No network calls are made during schema generation.
+  - The output file is only rewritten when the generated schema changed, so
+    downstream type generation keyed on its mtime is not retriggered.
 """
 
 import argparse
-import json
+import functools
+import hashlib
 from pathlib import Path
 
-from src.realtime.web_server import TradingDashboardServer
+import orjson
+from fastapi import FastAPI
+
+from src.realtime.web_server import build_routers
+
+
+def schema_fingerprint(payload: bytes) -> str:
+    """Hash of the serialized schema"""
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
 
 
 def main():
@@ -26,19 +38,24 @@ def main():
     )
     args = parser.parse_args()
 
-    # Initialize app (no network operations here)
-    server = TradingDashboardServer()
-    app = server.app
-
-    schema = app.openapi()
+    # Register routers only (no network operations here)
+    app = FastAPI(title="Live Trading Dashboard")
+    build_routers(app)
 
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(json.dumps(schema, indent=2), encoding="utf-8")
+
+    app.openapi = functools.lru_cache(maxsize=1)(app.openapi)
+    schema = app.openapi()
+
+    payload = orjson.dumps(schema, option=orjson.OPT_INDENT_2)
+    if out_path.exists() and schema_fingerprint(out_path.read_bytes()) == schema_fingerprint(payload):
+        print(f"✅ OpenAPI schema at {out_path} is up to date")
+        return
+    out_path.write_bytes(payload)
 
     print(f"✅ OpenAPI schema exported to {out_path}")
 
 
 if __name__ == "__main__":
     main()
-
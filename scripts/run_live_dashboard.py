@@ -4,15 +4,11 @@ Live Trading Dashboard Runner
 Starts the real-time trading dashboard with Binance WebSocket data
 """
 
-import asyncio
 import sys
-from pathlib import Path
-
-# Add project root to path so `import src` works
-sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from src.realtime.web_server import TradingDashboardServer
 from src.utils.logging import setup_logging
+from src.utils import event_loop
 from loguru import logger
 
 
@@ -55,7 +51,7 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        event_loop.run(main())
     except KeyboardInterrupt:
         print("\nShutdown complete.")
     except Exception as e:
@@ -4,49 +4,117 @@ Multi-Symbol Backtest Runner
 Run backtests for BTC, ETH, XRP with their optimized strategies
 """
 
-import sys
-import json
+import gc
+import os
 import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
+import numpy as np
+import orjson
 import pandas as pd
-import yaml
-
-# Add src to path
-sys.path.append(str(Path(__file__).parent.parent / "src"))
 
 from src.backtest.engine import BacktestEngine
+from src.data.cache import get_or_download
 from src.data.ohlcv_downloader import OHLCVDownloader
+from src.strategy.advanced_strategy import warm_up_kernels
+from src.utils.config import load_symbols_config
 from src.utils.logging import setup_logging
+from src.utils import event_loop
 from loguru import logger
 
 
+# Upper bound on concurrent Binance REST downloads
+MAX_CONCURRENT_DOWNLOADS = 8
+
+# Column dtypes and display precision for the comparison table
+COMPARISON_DTYPES = {
+    'Total Return %': 'float32',
+    'Win Rate %': 'float32',
+    'Total Trades': 'int32',
+    'Sharpe Ratio': 'float32',
+    'Max Drawdown %': 'float32',
+    'Avg Trade Return %': 'float32',
+}
+COMPARISON_METRICS = {
+    'Total Return %': 'total_return_pct',
+    'Win Rate %': 'win_rate',
+    'Total Trades': 'total_trades',
+    'Sharpe Ratio': 'sharpe_ratio',
+    'Max Drawdown %': 'max_drawdown_pct',
+    'Avg Trade Return %': 'avg_trade_return_pct',
+}
+COMPARISON_DISPLAY_ROWS = 20
+COMPARISON_FORMATTERS = {
+    'Total Return %': '{:.2f}'.format,
+    'Win Rate %': '{:.1f}'.format,
+    'Sharpe Ratio': '{:.3f}'.format,
+    'Max Drawdown %': '{:.2f}'.format,
+    'Avg Trade Return %': '{:.2f}'.format,
+}
+
+
+def _run_backtest_worker(engine: BacktestEngine, df: pd.DataFrame, output_dir: Path):
+    """Run a single backtest in a worker process"""
+    return engine.run_backtest(df, output_dir=output_dir)
+
+
 class MultiSymbolBacktester:
     """Run backtests for multiple symbols with their specific strategies"""
     
     def __init__(self):
         self.setup_logging()
         self.load_symbols()
+        self.load_engines()
         self.downloader = OHLCVDownloader()
         self.results = {}
+        self._download_semaphore = None
+        # Compile once here so worker processes inherit or load the cached kernels
+        warm_up_kernels()
+        self._pool = ProcessPoolExecutor(max_workers=os.cpu_count())
         
     def setup_logging(self):
         """Setup logging"""
         setup_logging(debug=False)
+    
+    def shutdown(self):
+        """Release the backtest worker processes"""
+        self._pool.shutdown()
         
     def load_symbols(self):
         """Load symbol configurations"""
-        config_path = Path(__file__).parent.parent / "config" / "symbols.yaml"
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_symbols_config()
         self.symbols = config['symbols']
         self.timeframes = config['timeframes']
         
         logger.info(f"Loaded symbols: {list(self.symbols.keys())}")
         logger.info(f"Timeframes: {self.timeframes}")
         
+    def load_engines(self):
+        """Build one backtest engine (parsed strategy config) per unique strategy and symbol"""
+        self._engines = {}
+        for symbol_config in self.symbols.values():
+            key = self._engine_key(symbol_config)
+            if key not in self._engines:
+                strategy, symbol, strategy_type = key
+                self._engines[key] = BacktestEngine(
+                    strategy_config_path=f"config/strategy.{strategy}.yaml",
+                    symbol=symbol,
+                    strategy_type=strategy_type
+                )
+    
+    @staticmethod
+    def _engine_key(symbol_config: dict) -> tuple:
+        return (
+            symbol_config['strategy'],
+            symbol_config['symbol'],
+            symbol_config.get('strategy_type', 'flexible')
+        )
+        
     async def download_data_for_symbol(self, symbol_key: str, symbol_config: dict, timeframe: str):
         """Download data for a specific symbol and timeframe"""
+        if self._download_semaphore is None:
+            self._download_semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
         try:
             logger.info(f"📥 Downloading {symbol_key} {timeframe} data...")
             
@@ -54,12 +122,14 @@ class MultiSymbolBacktester:
             end_date = datetime.now()
             start_date = end_date - timedelta(days=30)
             
-            df = await self.downloader.download_ohlcv(
-                symbol=symbol_config['symbol'],
-                timeframe=timeframe,
-                start_date=start_date,
-                end_date=end_date
-            )
+            async with self._download_semaphore:
+                df = await get_or_download(
+                    self.downloader,
+                    symbol=symbol_config['symbol'],
+                    timeframe=timeframe,
+                    start_date=start_date,
+                    end_date=end_date
+                )
             
             if df.empty:
                 logger.error(f"No data downloaded for {symbol_key} {timeframe}")
@@ -78,19 +148,14 @@ class MultiSymbolBacktester:
         try:
             logger.info(f"🔬 Running backtest for {symbol_key} {timeframe}...")
             
-            # Load strategy config
-            strategy_config_path = f"config/strategy.{symbol_config['strategy']}.yaml"
-            
-            # Initialize backtest engine
-            strategy_type = symbol_config.get('strategy_type', 'flexible')
-            engine = BacktestEngine(
-                strategy_config_path=strategy_config_path,
-                symbol=symbol_config['symbol'],
-                strategy_type=strategy_type
-            )
+            # Reuse the engine built at startup (strategy config already parsed)
+            engine = self._engines[self._engine_key(symbol_config)]
             
-            # Run backtest
-            results = engine.run_backtest(df)
+            # Run backtest in the process pool (indicator/signal math is CPU-bound).
+            # Timeframes of one symbol run concurrently, so each gets its own report directory
+            output_dir = Path(f"/app/reports/{symbol_config['symbol']}_{timeframe}_backtest")
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(self._pool, _run_backtest_worker, engine, df, output_dir)
             
             if results:
                 logger.success(f"✅ Backtest completed for {symbol_key} {timeframe}")
@@ -117,67 +182,99 @@ class MultiSymbolBacktester:
         logger.info("🚀 Starting multi-symbol backtests...")
         logger.info("=" * 60)
         
-        all_results = {}
-        
-        for symbol_key, symbol_config in self.symbols.items():
-            logger.info(f"Processing {symbol_key} ({symbol_config['display_name']})...")
+        # Move the startup heap out of the collector's view and keep it from
+        # rescanning long-lived objects while results are produced
+        gc.collect()
+        gc.freeze()
+        gc.disable()
+        try:
+            all_results = {}
             
-            symbol_results = {}
+            # Download data for every (symbol, timeframe) pair concurrently
+            tasks = [
+                (symbol_key, symbol_config, timeframe,
+                 asyncio.create_task(self.download_data_for_symbol(symbol_key, symbol_config, timeframe)))
+                for symbol_key, symbol_config in self.symbols.items()
+                for timeframe in self.timeframes
+            ]
+            await asyncio.gather(*(task for *_, task in tasks), return_exceptions=True)
+            downloads = {
+                (symbol_key, timeframe): task.result() if not task.exception() else None
+                for symbol_key, _, timeframe, task in tasks
+            }
             
-            for timeframe in self.timeframes:
-                logger.info(f"Timeframe: {timeframe}")
-                
-                # Download data
-                df = await self.download_data_for_symbol(symbol_key, symbol_config, timeframe)
-                if df is None:
-                    continue
-                
-                # Run backtest
-                results = await self.run_backtest_for_symbol(symbol_key, symbol_config, df, timeframe)
+            # Run all backtests in parallel across worker processes
+            jobs = [
+                (symbol_key, symbol_config, timeframe, downloads[(symbol_key, timeframe)])
+                for symbol_key, symbol_config in self.symbols.items()
+                for timeframe in self.timeframes
+                if downloads[(symbol_key, timeframe)] is not None
+            ]
+            backtests = await asyncio.gather(*(
+                self.run_backtest_for_symbol(symbol_key, symbol_config, df, timeframe)
+                for symbol_key, symbol_config, timeframe, df in jobs
+            ))
+            
+            for symbol_key in self.symbols:
+                all_results[symbol_key] = {}
+            for (symbol_key, _, timeframe, _), results in zip(jobs, backtests):
                 if results:
-                    symbol_results[timeframe] = results
+                    all_results[symbol_key][timeframe] = results
             
-            all_results[symbol_key] = symbol_results
+            for symbol_key, symbol_config in self.symbols.items():
+                logger.info(f"{symbol_key} ({symbol_config['display_name']}): "
+                            f"{len(all_results[symbol_key])}/{len(self.timeframes)} timeframes completed")
             logger.info("-" * 40)
-        
-        self.results = all_results
-        return all_results
+            
+            self.results = all_results
+            return all_results
+        finally:
+            gc.enable()
+            gc.unfreeze()
+            gc.collect()
     
     def generate_comparison_report(self):
         """Generate comparison report across all symbols and timeframes"""
         logger.info("📋 Generating comparison report...")
         
-        comparison = []
+        n = sum(len(symbol_results) for symbol_results in self.results.values())
+        labels = {column: [] for column in ('Symbol', 'Display Name', 'Strategy', 'Timeframe')}
+        values = {column: np.empty(n, dtype=dtype) for column, dtype in COMPARISON_DTYPES.items()}
         
+        i = 0
         for symbol_key, symbol_results in self.results.items():
             symbol_config = self.symbols[symbol_key]
             
             for timeframe, results in symbol_results.items():
                 metrics = results.get('metrics', {})
                 
-                comparison.append({
-                    'Symbol': symbol_key,
-                    'Display Name': symbol_config['display_name'],
-                    'Strategy': symbol_config['strategy'],
-                    'Timeframe': timeframe,
-                    'Total Return %': round(metrics.get('total_return_pct', 0), 2),
-                    'Win Rate %': round(metrics.get('win_rate', 0), 1),
-                    'Total Trades': metrics.get('total_trades', 0),
-                    'Sharpe Ratio': round(metrics.get('sharpe_ratio', 0), 3),
-                    'Max Drawdown %': round(metrics.get('max_drawdown_pct', 0), 2),
-                    'Avg Trade Return %': round(metrics.get('avg_trade_return_pct', 0), 2)
-                })
+                labels['Symbol'].append(symbol_key)
+                labels['Display Name'].append(symbol_config['display_name'])
+                labels['Strategy'].append(symbol_config['strategy'])
+                labels['Timeframe'].append(timeframe)
+                for column, metric in COMPARISON_METRICS.items():
+                    values[column][i] = metrics.get(metric, 0)
+                i += 1
         
         # Convert to DataFrame for easy viewing
-        df_comparison = pd.DataFrame(comparison)
+        df_comparison = pd.DataFrame({**labels, **values})
+        
+        report_path = Path(__file__).parent.parent / "reports" / f"multi_symbol_backtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        report_path.parent.mkdir(exist_ok=True)
         
         if not df_comparison.empty:
             # Sort by total return
-            df_comparison = df_comparison.sort_values('Total Return %', ascending=False)
+            df_comparison.sort_values('Total Return %', ascending=False, inplace=True, kind='stable')
+            
+            # Full table goes to CSV; the console only shows the top rows
+            comparison_path = report_path.with_suffix('.csv')
+            df_comparison.to_csv(comparison_path, index=False)
             
             logger.info("🏆 BACKTEST COMPARISON RESULTS:")
             logger.info("=" * 80)
-            print(df_comparison.to_string(index=False))
+            print(df_comparison.head(COMPARISON_DISPLAY_ROWS).to_string(index=False, formatters=COMPARISON_FORMATTERS))
+            if len(df_comparison) > COMPARISON_DISPLAY_ROWS:
+                logger.info(f"... {len(df_comparison) - COMPARISON_DISPLAY_ROWS} more rows in {comparison_path}")
             logger.info("=" * 80)
             
             # Find best performing strategy for each symbol
@@ -186,14 +283,18 @@ class MultiSymbolBacktester:
                 symbol_data = df_comparison[df_comparison['Symbol'] == symbol_key]
                 if not symbol_data.empty:
                     best = symbol_data.iloc[0]
-                    logger.info(f"{symbol_key}: {best['Timeframe']} - {best['Total Return %']}% return, {best['Win Rate %']}% win rate")
+                    logger.info(f"{symbol_key}: {best['Timeframe']} - {best['Total Return %']:.2f}% return, {best['Win Rate %']:.1f}% win rate")
+            
+            logger.info(f"💾 Comparison table saved to: {comparison_path}")
         
         # Save detailed results
-        report_path = Path(__file__).parent.parent / "reports" / f"multi_symbol_backtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        report_path.parent.mkdir(exist_ok=True)
-        
-        with open(report_path, 'w') as f:
-            json.dump(self.results, f, indent=2, default=str)
+        # orjson handles numpy scalars and datetimes natively; str() remains the
+        # fallback for objects such as the vectorbt Portfolio
+        report_path.write_bytes(orjson.dumps(
+            self.results,
+            default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+        ))
         
         logger.info(f"💾 Detailed results saved to: {report_path}")
         
@@ -222,7 +323,9 @@ async def main():
     except Exception as e:
         logger.error(f"❌ Error in multi-symbol backtest: {e}")
         raise
+    finally:
+        backtester.shutdown()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    event_loop.run(main())
\ No newline at end of file
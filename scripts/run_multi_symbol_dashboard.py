@@ -4,15 +4,11 @@ Multi-Symbol Live Trading Dashboard Runner
 Starts the real-time trading dashboard for BTC, ETH, and XRP
 """
 
-import asyncio
 import sys
-from pathlib import Path
-
-# Add project root to path so `import src` works
-sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from src.realtime.multi_symbol_dashboard import MultiSymbolTradingDashboard
 from src.utils.logging import setup_logging
+from src.utils import event_loop
 from loguru import logger
 import os
 
@@ -56,7 +52,7 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        event_loop.run(main())
     except KeyboardInterrupt:
         print("\nShutdown complete.")
     except Exception as e:
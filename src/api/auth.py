@@ -1,34 +1,56 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Body, Request
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, status, Body, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, EmailStr
-from typing import Optional
-import secrets
+from pydantic import BaseModel, ConfigDict, EmailStr, StringConstraints, ValidationError
+from typing import Annotated, Optional
+from collections import OrderedDict
+import asyncio
+import base64
+import binascii
 import hashlib
-import jwt
+import hmac
+import json
+import orjson
+import re
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from datetime import datetime, timedelta, timezone
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+import time
+from email.message import EmailMessage
 import os
 from loguru import logger
 
 from ..database.db_manager import TradingDBManager as Database
-from psycopg2.extras import RealDictCursor
+from psycopg2.errors import UniqueViolation
 
-router = APIRouter(prefix="/auth", tags=["authentication"])
+router = APIRouter(prefix="/auth", tags=["authentication"], default_response_class=ORJSONResponse)
 security = HTTPBearer()
 
+# Request bodies: surrounding whitespace, oversized strings and unknown
+# fields are rejected by pydantic-core before any handler code runs
+REQUEST_MODEL_CONFIG = ConfigDict(str_strip_whitespace=True, str_max_length=256, extra='forbid')
+
+# Passwords keep their whitespace; the cap bounds the Argon2 input
+Password = Annotated[str, StringConstraints(strip_whitespace=False, max_length=128)]
+
 # Pydantic models for request/response
 class RegisterRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     email: EmailStr
-    password: str
+    password: Password
     first_name: str
     last_name: str
     phone: str
 
 class LoginRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     email: EmailStr
-    password: str
+    password: Password
 
 class UserResponse(BaseModel):
     id: str
@@ -39,46 +61,73 @@ class UserResponse(BaseModel):
     telegram_id: Optional[str]
     is_active: bool
     is_email_verified: bool
-    last_login: Optional[str]
-    created_at: str
+    last_login: Optional[datetime]
+    created_at: datetime
 
 class UserSessionResponse(BaseModel):
     session_token: str
     user: UserResponse
-    expires_at: str
+    expires_at: datetime
 
 class RegisterResponse(BaseModel):
     success: bool
     message: str
 
 class VerificationCodeRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     email: EmailStr
 
 class VerifyEmailRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     email: EmailStr
     verification_code: str
 
 class PasswordResetRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     email: EmailStr
 
 class PasswordResetVerifyRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     email: EmailStr
     verification_code: str
 
 class PasswordResetFinalizeRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     email: EmailStr
-    new_password: str
+    new_password: Password
 
 class UpdateProfileRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     first_name: Optional[str] = None
     last_name: Optional[str] = None
     phone: Optional[str] = None
     telegram_id: Optional[str] = None
 
+def warm_up_request_models():
+    """Run the JSON validators of the hot request models once, EmailStr check included"""
+    RegisterRequest.model_validate_json(
+        b'{"email":"warmup@example.com","password":"x","first_name":"x","last_name":"x","phone":"x"}'
+    )
+    LoginRequest.model_validate_json(b'{"email":"warmup@example.com","password":"x"}')
+    VerifyEmailRequest.model_validate_json(b'{"email":"warmup@example.com","verification_code":"x"}')
+
+warm_up_request_models()
+
 # JWT settings
 JWT_SECRET = os.getenv('JWT_SECRET', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_HOURS = 24
+JWT_SECRET_BYTES = JWT_SECRET.encode()
+JWT_TTL = timedelta(hours=JWT_EXPIRATION_HOURS)
+
+# Verification and password-reset codes expire after 10 minutes
+VERIFICATION_CODE_TTL = timedelta(minutes=10)
 
 # Email settings (configure these environment variables)
 SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
@@ -87,163 +136,522 @@ SMTP_EMAIL = os.getenv('SMTP_EMAIL', '')
 SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', '')
 AUTH_TEST_MODE = os.getenv('AUTH_TEST_MODE', 'true').lower() == 'true'
 
+# Argon2id parameters (OWASP 46 MiB profile); existing hashes with other
+# parameters are upgraded on the next successful login
+PASSWORD_HASHER = PasswordHasher(
+    time_cost=int(os.getenv('ARGON2_TIME_COST', '2')),
+    memory_cost=int(os.getenv('ARGON2_MEMORY_COST_KIB', str(46 * 1024))),
+    parallelism=1,
+)
+
 def hash_password(password: str) -> str:
-    """Hash password using SHA-256 with salt"""
-    salt = secrets.token_hex(16)
-    password_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}:{password_hash}"
+    """Hash password with Argon2id (PHC string format)"""
+    return PASSWORD_HASHER.hash(password)
+
+def _verify_legacy_password(password: str, hashed: str) -> bool:
+    """Verify a pre-Argon2 'salt:sha256' password hash"""
+    # hashlib's sha256 is OpenSSL-backed and uses the CPU's SHA extensions
+    # (SHA-NI / ARMv8 SHA2) where available; the compare must be constant-time
+    salt, _, password_hash = hashed.partition(':')
+    try:
+        expected = bytes.fromhex(password_hash)
+    except ValueError:
+        return False
+    if not expected:
+        return False
+    # Feed password then salt separately; same digest as sha256((password + salt).encode())
+    h = hashlib.sha256(password.encode())
+    h.update(salt.encode())
+    return hmac.compare_digest(h.digest(), expected)
+
+# Successful Argon2 checks are remembered so repeat logins skip the KDF. Keys
+# are a BLAKE2b MAC of (stored hash, password) under a per-process random key;
+# failures are never cached, and a changed hash naturally misses
+PASSWORD_CACHE_SIZE = 4096
+_PASSWORD_CACHE_KEY = os.urandom(32)
+_password_cache: "OrderedDict[bytes, None]" = OrderedDict()
+_password_cache_lock = threading.Lock()
+
+def _password_cache_key(password: str, hashed: str) -> bytes:
+    h = hashlib.blake2b(hashed.encode(), key=_PASSWORD_CACHE_KEY, digest_size=16)
+    h.update(b"\0")
+    h.update(password.encode())
+    return h.digest()
 
 def verify_password(password: str, hashed: str) -> bool:
     """Verify password against hash"""
+    if not hashed.startswith('$argon2'):
+        return _verify_legacy_password(password, hashed)
+    key = _password_cache_key(password, hashed)
+    with _password_cache_lock:
+        if key in _password_cache:
+            _password_cache.move_to_end(key)
+            return True
     try:
-        salt, password_hash = hashed.split(':')
-        return password_hash == hashlib.sha256((password + salt).encode()).hexdigest()
-    except:
+        PASSWORD_HASHER.verify(hashed, password)
+    except (VerificationError, InvalidHashError):
         return False
+    with _password_cache_lock:
+        _password_cache[key] = None
+        if len(_password_cache) > PASSWORD_CACHE_SIZE:
+            _password_cache.popitem(last=False)
+    return True
+
+def password_needs_rehash(hashed: str) -> bool:
+    """True for legacy SHA-256 hashes and Argon2 hashes with outdated parameters"""
+    return not hashed.startswith('$argon2') or PASSWORD_HASHER.check_needs_rehash(hashed)
+
+class InvalidTokenError(Exception):
+    """Malformed token, unsupported algorithm or bad signature"""
+
+class ExpiredTokenError(InvalidTokenError):
+    """Token is past its exp claim"""
+
+def _b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+def _b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+# We only issue HS256 tokens, so the encoded header is a constant
+JWT_HEADER_B64 = _b64url_encode(orjson.dumps({"alg": JWT_ALGORITHM, "typ": "JWT"}))
+
+# Keyed HMAC state (inner/outer pads already absorbed); each signature clones it
+_JWT_HMAC = hmac.new(JWT_SECRET_BYTES, digestmod=hashlib.sha256)
+
+def _jwt_sign(signing_input: bytes) -> bytes:
+    h = _JWT_HMAC.copy()
+    h.update(signing_input)
+    return h.digest()
 
 def generate_jwt_token(user_id: str) -> str:
-    """Generate JWT token"""
+    """Generate JWT token (compact HS256 JWS)"""
+    now = int(time.time())
     payload = {
         'user_id': user_id,
-        'exp': datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS),
-        'iat': datetime.utcnow()
+        'exp': now + JWT_EXPIRATION_HOURS * 3600,
+        'iat': now
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    signing_input = JWT_HEADER_B64 + b"." + _b64url_encode(orjson.dumps(payload))
+    signature = _jwt_sign(signing_input)
+    return (signing_input + b"." + _b64url_encode(signature)).decode()
+
+def decode_jwt_token(token: str, require: tuple = ('exp',)) -> dict:
+    """Verify an HS256 token's signature and expiry and return its claims"""
+    try:
+        signing_input, _, signature = token.encode().rpartition(b".")
+        header_b64, _, payload_b64 = signing_input.partition(b".")
+        header = orjson.loads(_b64url_decode(header_b64))
+        if not isinstance(header, dict) or header.get("alg") != JWT_ALGORITHM:
+            raise InvalidTokenError("Unsupported token algorithm")
+        expected = _jwt_sign(signing_input)
+        if not hmac.compare_digest(expected, _b64url_decode(signature)):
+            raise InvalidTokenError("Signature verification failed")
+        payload = orjson.loads(_b64url_decode(payload_b64))
+    except (ValueError, binascii.Error, orjson.JSONDecodeError) as e:
+        raise InvalidTokenError(str(e))
+    if not isinstance(payload, dict):
+        raise InvalidTokenError("Token payload is not an object")
+    for claim in require:
+        if not payload.get(claim):
+            raise InvalidTokenError(f"Missing {claim} claim")
+    if not isinstance(payload.get('exp'), (int, float)):
+        raise InvalidTokenError("Missing exp claim")
+    if payload['exp'] <= time.time():
+        raise ExpiredTokenError("Token has expired")
+    return payload
+
+# Verification codes draw from a per-thread buffer of OS randomness, refilled
+# every CODE_RANDOM_BUFFER_SIZE // 4 draws instead of one urandom call per code
+CODE_RANDOM_BUFFER_SIZE = 4096
+# Largest multiple of 10**6 below 2**32; draws above it are rejected to keep codes unbiased
+CODE_RANGE_LIMIT = (2**32 // 1_000_000) * 1_000_000
+_code_random = threading.local()
+
+def _random_u32() -> int:
+    buf = getattr(_code_random, 'buf', b'')
+    off = getattr(_code_random, 'off', 0)
+    if off + 4 > len(buf):
+        buf = _code_random.buf = os.urandom(CODE_RANDOM_BUFFER_SIZE)
+        off = 0
+    _code_random.off = off + 4
+    return int.from_bytes(buf[off:off + 4], 'big')
 
 def generate_verification_code() -> str:
     """Generate 6-digit verification code. Fixed in test mode."""
     if AUTH_TEST_MODE:
         return "111111"
-    return f"{secrets.randbelow(1000000):06d}"
+    while True:
+        n = _random_u32()
+        if n < CODE_RANGE_LIMIT:
+            return f"{n % 1_000_000:06d}"
 
-async def send_verification_email(email: str, verification_code: str, purpose: str = "verification"):
-    """Send verification/reset email. Skips SMTP in test mode."""
-    subject_map = {
-        "verification": "E-posta Doğrulama Kodu",
-        "password_reset": "Şifre Sıfırlama Kodu",
-    }
-    subject = subject_map.get(purpose, "Doğrulama Kodu")
-    html_body = f"""
+class SMTPPool:
+    """One long-lived, authenticated SMTP connection reused across sends"""
+    
+    def __init__(self, server: str, port: int, email: str, password: str):
+        self.server = server
+        self.port = port
+        self.email = email
+        self.password = password
+        self.client: Optional[smtplib.SMTP] = None
+        # Background sends run in Starlette's threadpool
+        self.lock = threading.Lock()
+    
+    def _connect(self) -> smtplib.SMTP:
+        client = smtplib.SMTP(self.server, self.port)
+        client.starttls()
+        if self.email and self.password:
+            client.login(self.email, self.password)
+        return client
+    
+    def send(self, to_addrs: list, msg: str):
+        """Send over the cached connection, reconnecting once if the server dropped it"""
+        with self.lock:
+            for attempt in range(2):
+                if self.client is None:
+                    self.client = self._connect()
+                try:
+                    self.client.sendmail(self.email, to_addrs, msg)
+                    return
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    self.client = None
+                    if attempt:
+                        raise
+    
+    def close(self):
+        """Close the cached connection"""
+        with self.lock:
+            if self.client is not None:
+                try:
+                    self.client.quit()
+                except Exception:
+                    pass
+                self.client = None
+
+smtp_pool = SMTPPool(SMTP_SERVER, SMTP_PORT, SMTP_EMAIL, SMTP_PASSWORD)
+
+# Verification email bodies, rendered once per purpose; only the code varies per send
+VERIFICATION_EMAIL_SUBJECTS = {
+    "verification": "E-posta Doğrulama Kodu",
+    "password_reset": "Şifre Sıfırlama Kodu",
+}
+VERIFICATION_EMAIL_DEFAULT_SUBJECT = "Doğrulama Kodu"
+VERIFICATION_EMAIL_HTML = """
     <html><body>
       <h2>{subject}</h2>
       <p>Kodunuz:</p>
-      <div style='font-size:24px;font-weight:700;letter-spacing:3px'>{verification_code}</div>
+      <div style='font-size:24px;font-weight:700;letter-spacing:3px'>{{code}}</div>
       <p>Bu kod 10 dakika içinde geçerlidir.</p>
     </body></html>
     """
+VERIFICATION_EMAIL_BODIES = {
+    subject: VERIFICATION_EMAIL_HTML.format(subject=subject)
+    for subject in (*VERIFICATION_EMAIL_SUBJECTS.values(), VERIFICATION_EMAIL_DEFAULT_SUBJECT)
+}
+
+def send_verification_email(email: str, verification_code: str, purpose: str = "verification"):
+    """Send verification/reset email (blocking). Skips SMTP in test mode."""
     if AUTH_TEST_MODE:
         logger.info(f"Test mode: {purpose} code for {email} is {verification_code}")
         return
+    subject = VERIFICATION_EMAIL_SUBJECTS.get(purpose, VERIFICATION_EMAIL_DEFAULT_SUBJECT)
     try:
-        msg = MIMEMultipart('alternative')
+        # Single HTML part, so no multipart container is needed
+        msg = EmailMessage()
         msg['Subject'] = subject
         msg['From'] = SMTP_EMAIL
         msg['To'] = email
-        msg.attach(MIMEText(html_body, 'html'))
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            if SMTP_EMAIL and SMTP_PASSWORD:
-                server.login(SMTP_EMAIL, SMTP_PASSWORD)
-            server.sendmail(SMTP_EMAIL, [email], msg.as_string())
+        msg.set_content(VERIFICATION_EMAIL_BODIES[subject].format(code=verification_code), subtype='html')
+        smtp_pool.send([email], msg.as_string())
     except Exception as e:
         logger.error(f"Failed to send {purpose} email to {email}: {e}")
 
+# Verification emails queued by handlers are sent in batches by one worker
+EMAIL_BATCH_SIZE = 64
+EMAIL_BATCH_WAIT_SECONDS = 0.005
+
+def send_verification_email_batch(batch: list):
+    """Send queued (email, code, purpose) items back to back over the pooled SMTP connection"""
+    for email, verification_code, purpose in batch:
+        send_verification_email(email, verification_code, purpose)
+
+class VerificationEmailQueue:
+    """Collects verification emails from request handlers and sends them from a single worker task"""
+    
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker: Optional[asyncio.Task] = None
+    
+    def put(self, email: str, verification_code: str, purpose: str = "verification"):
+        """Queue an email; starts the worker on the running loop if needed"""
+        if AUTH_TEST_MODE:
+            # Nothing goes over SMTP in test mode, so just log inline
+            send_verification_email(email, verification_code, purpose)
+            return
+        if self.worker is None or self.worker.done():
+            self.queue = asyncio.Queue()
+            self.worker = asyncio.get_running_loop().create_task(self._run())
+        self.queue.put_nowait((email, verification_code, purpose))
+    
+    async def _run(self):
+        while True:
+            # Give a burst of signups a moment to queue up, then send them together
+            batch = [await self.queue.get()]
+            await asyncio.sleep(EMAIL_BATCH_WAIT_SECONDS)
+            while len(batch) < EMAIL_BATCH_SIZE and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                await asyncio.to_thread(send_verification_email_batch, batch)
+            except Exception as e:
+                logger.error(f"Verification email batch failed: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+    
+    async def stop(self, timeout: float = 5.0):
+        """Flush queued emails (up to timeout) and stop the worker"""
+        if self.worker is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self.queue.qsize()} unsent verification emails on shutdown")
+        self.worker.cancel()
+        self.worker = None
+
+email_queue = VerificationEmailQueue()
+
+PASSWORD_DIGIT_RE = re.compile(r'\d')
+
 def validate_password_strength(password: str) -> Optional[str]:
     """Return None if strong; otherwise return message describing issue"""
     if len(password) < 8:
         return "Şifre en az 8 karakter olmalıdır."
-    has_upper = any(c.isupper() for c in password)
-    has_lower = any(c.islower() for c in password)
-    has_digit = any(c.isdigit() for c in password)
+    # Case-mapping and regex scans run in C; both are Unicode-aware, so
+    # Turkish letters such as 'Ş'/'ş' still count as upper/lower case
+    has_upper = password.lower() != password
+    has_lower = password.upper() != password
+    has_digit = PASSWORD_DIGIT_RE.search(password) is not None
     if not (has_upper and has_lower and has_digit):
         return "Şifre büyük/küçük harf ve rakam içermelidir."
     return None
 
+# Verified tokens -> (user_id, exp), so repeat requests with the same bearer
+# token skip the HMAC and JSON work until the token expires
+TOKEN_CACHE_SIZE = 10_000
+_token_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+def forget_token(token: str) -> None:
+    """Drop a token from the verified-token cache"""
+    with _token_cache_lock:
+        _token_cache.pop(token, None)
+
+def forget_user_tokens(user_id) -> None:
+    """Drop every cached token of a user (after a credential change)"""
+    user_id = str(user_id)
+    with _token_cache_lock:
+        for token in [t for t, hit in _token_cache.items() if str(hit[0]) == user_id]:
+            del _token_cache[token]
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current user from JWT token"""
+    token = credentials.credentials
+    with _token_cache_lock:
+        hit = _token_cache.get(token)
+        if hit is not None:
+            if hit[1] > time.time():
+                _token_cache.move_to_end(token)
+                return hit[0]
+            del _token_cache[token]
     try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get('user_id')
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Geçersiz token"
-            )
+        payload = decode_jwt_token(token, require=('exp', 'user_id'))
+        user_id = payload['user_id']
+        with _token_cache_lock:
+            _token_cache[token] = (user_id, payload['exp'])
+            if len(_token_cache) > TOKEN_CACHE_SIZE:
+                _token_cache.popitem(last=False)
         return user_id
-    except jwt.ExpiredSignatureError:
+    except ExpiredTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token süresi dolmuş"
         )
-    except jwt.InvalidTokenError:
+    except InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Geçersiz token"
         )
 
-@router.post("/register", response_model=RegisterResponse)
-async def register_user(request: RegisterRequest):
-    """Register new user"""
-    db = Database()
-    
+_db: Optional[Database] = None
+
+def get_db() -> Database:
+    """Shared database manager, so every request draws from one connection pool"""
+    global _db
+    if _db is None:
+        _db = Database()
+    return _db
+
+# Expired verification codes and abandoned registrations are purged in the
+# background instead of piling up until the same email registers again
+CLEANUP_INTERVAL_SECONDS = 300
+CLEANUP_GRACE = "1 day"
+_cleanup_task: Optional[asyncio.Task] = None
+
+def purge_expired_registrations(db: Database) -> int:
+    """Delete stale email verification codes and pending registrations"""
+    purged = db.execute(
+        "DELETE FROM email_verifications WHERE expires_at < NOW() - %s::interval",
+        (CLEANUP_GRACE,)
+    )
+    purged += db.execute(
+        """
+        DELETE FROM temp_registrations t
+        WHERE t.created_at < NOW() - %s::interval
+          AND NOT EXISTS (
+              SELECT 1 FROM email_verifications v
+              WHERE v.email = t.email AND v.expires_at > NOW()
+          )
+        """,
+        (CLEANUP_GRACE,)
+    )
+    return purged
+
+async def cleanup_loop():
+    """Periodically purge expired registration rows"""
+    while True:
+        try:
+            purged = await asyncio.to_thread(purge_expired_registrations, get_db())
+            if purged:
+                logger.info(f"Purged {purged} expired registration rows")
+        except Exception as e:
+            logger.error(f"Registration cleanup error: {e}")
+        await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
+
+async def open_db():
+    """Open the connection pool at startup so the first requests don't pay for connecting"""
+    global _cleanup_task
     try:
-        # Check if user already exists
-        conn = db.get_connection()
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute("SELECT id FROM users WHERE email = %s", (request.email,))
-            result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            return RegisterResponse(
-                success=False, 
-                message="Bu email adresi zaten kullanılıyor."
+        await asyncio.to_thread(get_db().get_pool)
+    except Exception as e:
+        logger.warning(f"Could not open auth database pool at startup, will retry on first request: {e}")
+    _cleanup_task = asyncio.create_task(cleanup_loop())
+
+def close_db():
+    """Stop the cleanup task and close the pooled database connections on shutdown"""
+    if _cleanup_task is not None:
+        _cleanup_task.cancel()
+    if _db is not None:
+        _db.close_pool()
+
+router.add_event_handler("startup", open_db)
+router.add_event_handler("shutdown", close_db)
+router.add_event_handler("shutdown", email_queue.stop)
+router.add_event_handler("shutdown", smtp_pool.close)
+
+def json_body_error(body: bytes) -> Optional[dict]:
+    """FastAPI's own 422 entry for an empty or undecodable body, None if the JSON decodes"""
+    if not body:
+        return {"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}
+    try:
+        json.loads(body)
+    except json.JSONDecodeError as e:
+        return {
+            "type": "json_invalid",
+            "loc": ("body", e.pos),
+            "msg": "JSON decode error",
+            "input": {},
+            "ctx": {"error": e.msg},
+        }
+    except UnicodeDecodeError:
+        pass
+    return None
+
+def json_body(model: type):
+    """Body dependency that validates raw JSON bytes in one pass with pydantic-core"""
+    async def parse(request: Request):
+        body = await request.body()
+        try:
+            return model.model_validate_json(body)
+        except ValidationError as e:
+            errors = e.errors(include_url=False)
+            # Decode failures are rare; re-parse only then, to report them the way FastAPI does
+            if errors[0]["type"] == "json_invalid" or not body:
+                decode_error = json_body_error(body)
+                if decode_error is not None:
+                    raise RequestValidationError([decode_error])
+            raise RequestValidationError(
+                [{**err, "loc": ("body", *err["loc"])} for err in errors]
             )
-        
+    return parse
+
+def json_body_openapi(model: type) -> dict:
+    """Request body schema for routes that parse their body with json_body"""
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": model.model_json_schema()}}}}
+
+@router.post("/register", response_model=RegisterResponse, openapi_extra=json_body_openapi(RegisterRequest))
+async def register_user(request: RegisterRequest = Depends(json_body(RegisterRequest)),
+                        db: Database = Depends(get_db)):
+    """Register new user"""
+    try:
         # Validate password
         pw_err = validate_password_strength(request.password)
         if pw_err:
             return RegisterResponse(success=False, message=pw_err)
         # Hash password
-        hashed_password = hash_password(request.password)
+        # Argon2 is CPU-bound and releases the GIL; keep it off the event loop
+        hashed_password = await asyncio.to_thread(hash_password, request.password)
         
         # Generate verification code
         verification_code = generate_verification_code()
         
-        # Store verification code temporarily (expires in 10 minutes)
-        expire_time = datetime.now(timezone.utc) + timedelta(minutes=10)
-        conn = db.get_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("""
+        # Check for an existing user, store the verification code (expires in
+        # 10 minutes) and the pending registration in a single round trip; the
+        # writes are skipped when the email is already taken
+        now = datetime.now(timezone.utc)
+        expire_time = now + VERIFICATION_CODE_TTL
+        result = await asyncio.to_thread(db.fetch_one, """
+            WITH existing AS (
+                SELECT 1 FROM users WHERE lower(email) = lower(%(email)s)
+            ), verification AS (
                 INSERT INTO email_verifications (email, verification_code, expires_at)
-                VALUES (%s, %s, %s)
+                SELECT %(email)s, %(code)s, %(expires_at)s
+                WHERE NOT EXISTS (SELECT 1 FROM existing)
                 ON CONFLICT (email) DO UPDATE SET
                     verification_code = EXCLUDED.verification_code,
                     expires_at = EXCLUDED.expires_at
-            """, (request.email, verification_code, expire_time))
-            conn.commit()
-        conn.close()
-        
-        # Store user data temporarily (will be activated after email verification)
-        now = datetime.now(timezone.utc)
-        conn = db.get_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("""
+            ), registration AS (
                 INSERT INTO temp_registrations (email, password_hash, first_name, last_name, phone, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s)
+                SELECT %(email)s, %(password_hash)s, %(first_name)s, %(last_name)s, %(phone)s, %(created_at)s
+                WHERE NOT EXISTS (SELECT 1 FROM existing)
                 ON CONFLICT (email) DO UPDATE SET
                     password_hash = EXCLUDED.password_hash,
                     first_name = EXCLUDED.first_name,
                     last_name = EXCLUDED.last_name,
                     phone = EXCLUDED.phone,
                     created_at = EXCLUDED.created_at
-            """, (request.email, hashed_password, request.first_name,
-                  request.last_name, request.phone, now))
-            conn.commit()
-        conn.close()
+            )
+            SELECT EXISTS (SELECT 1 FROM existing) AS email_taken
+        """, {
+            'email': request.email,
+            'code': verification_code,
+            'expires_at': expire_time,
+            'password_hash': hashed_password,
+            'first_name': request.first_name,
+            'last_name': request.last_name,
+            'phone': request.phone,
+            'created_at': now,
+        })
+        
+        if result['email_taken']:
+            return RegisterResponse(
+                success=False, 
+                message="Bu email adresi zaten kullanılıyor."
+            )
         
-        # Send verification email
-        await send_verification_email(request.email, verification_code, purpose="verification")
+        # Queue the verification email; it goes out with the next batch
+        email_queue.put(request.email, verification_code, purpose="verification")
         
         return RegisterResponse(
             success=True,
@@ -257,61 +665,57 @@ async def register_user(request: RegisterRequest):
             message="Kayıt sırasında bir hata oluştu."
         )
 
-@router.post("/verify-email", response_model=RegisterResponse)
-async def verify_email(request: VerifyEmailRequest):
+@router.post("/verify-email", response_model=RegisterResponse, openapi_extra=json_body_openapi(VerifyEmailRequest))
+async def verify_email(request: VerifyEmailRequest = Depends(json_body(VerifyEmailRequest)),
+                       db: Database = Depends(get_db)):
     """Verify email and activate user account"""
-    db = Database()
-    
     try:
-        # Check verification code
-        conn = db.get_connection()
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute("""
-                SELECT verification_code FROM email_verifications 
-                WHERE email = %s AND expires_at > NOW()
-            """, (request.email,))
-            result = cursor.fetchone()
+        # Consume the verification code, move the pending registration into
+        # users (let PostgreSQL generate UUID) and clean up in one statement
+        result = await asyncio.to_thread(db.fetch_one, """
+            WITH verification AS (
+                DELETE FROM email_verifications
+                WHERE email = %(email)s AND verification_code = %(code)s AND expires_at > NOW()
+                RETURNING email
+            ), registration AS (
+                DELETE FROM temp_registrations
+                WHERE email IN (SELECT email FROM verification)
+                RETURNING email, password_hash, first_name, last_name, phone, created_at
+            ), new_user AS (
+                INSERT INTO users (email, password_hash, first_name, last_name, phone, 
+                                 is_active, is_email_verified, created_at)
+                SELECT email, password_hash, first_name, last_name, phone, true, true, created_at
+                FROM registration
+                RETURNING id
+            )
+            SELECT EXISTS (SELECT 1 FROM verification) AS verified,
+                   EXISTS (SELECT 1 FROM new_user) AS created
+        """, {'email': request.email, 'code': request.verification_code})
         
-        if not result or result['verification_code'] != request.verification_code:
-            conn.close()
+        if not result['verified']:
             return RegisterResponse(
                 success=False,
                 message="Geçersiz veya süresi dolmuş doğrulama kodu."
             )
         
-        # Get temporary registration data
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute("SELECT * FROM temp_registrations WHERE email = %s", (request.email,))
-            temp_data = cursor.fetchone()
-        
-        if not temp_data:
-            conn.close()
+        if not result['created']:
             return RegisterResponse(
                 success=False,
                 message="Kayıt verileri bulunamadı. Lütfen tekrar kayıt olun."
             )
         
-        # Create actual user account (let PostgreSQL generate UUID)
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                INSERT INTO users (email, password_hash, first_name, last_name, phone, 
-                                 is_active, is_email_verified, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (request.email, temp_data['password_hash'],
-                  temp_data['first_name'], temp_data['last_name'], temp_data['phone'],
-                  True, True, temp_data['created_at']))
-            
-            # Clean up temporary data
-            cursor.execute("DELETE FROM email_verifications WHERE email = %s", (request.email,))
-            cursor.execute("DELETE FROM temp_registrations WHERE email = %s", (request.email,))
-            conn.commit()
-        conn.close()
-        
         return RegisterResponse(
             success=True,
             message="Hesabınız başarıyla oluşturuldu! Şimdi giriş yapabilirsiniz."
         )
         
+    except UniqueViolation:
+        # Another verification created this account first; the unique email
+        # index is the race-free duplicate check
+        return RegisterResponse(
+            success=False,
+            message="Bu email adresi zaten kullanılıyor."
+        )
     except Exception as e:
         logger.error(f"Email verification error: {e}")
         return RegisterResponse(
@@ -319,52 +723,70 @@ async def verify_email(request: VerifyEmailRequest):
             message="Doğrulama sırasında bir hata oluştu."
         )
 
+# Last time this process issued a code per email. Repeat requests inside the
+# window are refused without touching the database; the conditional writes in
+# the handlers still enforce the window across workers
+CODE_RESEND_INTERVAL_SECONDS = 60
+CODE_RESEND_WINDOW = f"{CODE_RESEND_INTERVAL_SECONDS} seconds"
+CODE_THROTTLE_SIZE = 100_000
+_code_sent_at: "OrderedDict[str, float]" = OrderedDict()
+
+def code_sent_recently(email: str) -> bool:
+    """True if this process issued a code to the email within the resend window"""
+    sent_at = _code_sent_at.get(email)
+    return sent_at is not None and time.monotonic() - sent_at < CODE_RESEND_INTERVAL_SECONDS
+
+def remember_code_sent(email: str) -> None:
+    """Record that a code was just issued to the email"""
+    _code_sent_at[email] = time.monotonic()
+    _code_sent_at.move_to_end(email)
+    if len(_code_sent_at) > CODE_THROTTLE_SIZE:
+        _code_sent_at.popitem(last=False)
+
 @router.post("/resend-verification", response_model=RegisterResponse)
-async def resend_verification_code(request: VerificationCodeRequest):
+async def resend_verification_code(request: VerificationCodeRequest, db: Database = Depends(get_db)):
     """Resend verification code"""
-    db = Database()
-    
     try:
-        # Check if there's a pending registration
-        conn = db.get_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT email FROM temp_registrations WHERE email = %s", (request.email,))
-            result = cursor.fetchone()
+        if code_sent_recently(request.email):
+            return RegisterResponse(success=False, message="Çok sık istek yapıldı. Lütfen 1 dakika sonra tekrar deneyin.")
         
-        if not result:
-            conn.close()
+        # Issue a new code only for a pending registration whose last code is
+        # older than the resend window (checked in the same statement)
+        verification_code = generate_verification_code()
+        expire_time = datetime.now(timezone.utc) + VERIFICATION_CODE_TTL
+        result = await asyncio.to_thread(db.fetch_one, """
+            WITH pending AS (
+                SELECT 1 FROM temp_registrations WHERE email = %(email)s
+            ), issued AS (
+                INSERT INTO email_verifications (email, verification_code, expires_at)
+                SELECT %(email)s, %(code)s, %(expires_at)s
+                WHERE EXISTS (SELECT 1 FROM pending)
+                ON CONFLICT (email) DO UPDATE SET
+                    verification_code = EXCLUDED.verification_code,
+                    expires_at = EXCLUDED.expires_at,
+                    created_at = NOW()
+                WHERE email_verifications.created_at IS NULL
+                   OR email_verifications.created_at <= NOW() - %(window)s::interval
+                RETURNING 1
+            )
+            SELECT EXISTS (SELECT 1 FROM pending) AS pending,
+                   EXISTS (SELECT 1 FROM issued) AS issued
+        """, {'email': request.email, 'code': verification_code,
+              'expires_at': expire_time, 'window': CODE_RESEND_WINDOW})
+        
+        if not result['pending']:
             return RegisterResponse(
                 success=False,
                 message="Bu email için bekleyen bir kayıt bulunamadı."
             )
         
-        # Simple throttle: limit 1 resend per 60 seconds
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute(
-                "SELECT created_at FROM email_verifications WHERE email = %s",
-                (request.email,),
-            )
-            prev = cursor.fetchone()
-        if prev and prev.get('created_at') and (datetime.now(timezone.utc) - prev['created_at']).total_seconds() < 60:
-            conn.close()
+        if not result['issued']:
             return RegisterResponse(success=False, message="Çok sık istek yapıldı. Lütfen 1 dakika sonra tekrar deneyin.")
-
-        # Generate new verification code
-        verification_code = generate_verification_code()
-        expire_time = datetime.now(timezone.utc) + timedelta(minutes=10)
         
-        # Update verification code
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                UPDATE email_verifications 
-                SET verification_code = %s, expires_at = %s, created_at = NOW()
-                WHERE email = %s
-            """, (verification_code, expire_time, request.email))
-            conn.commit()
-        conn.close()
+        remember_code_sent(request.email)
         
-        # Send verification email
-        await send_verification_email(request.email, verification_code, purpose="verification")
+        # Queue the verification email; it goes out with the next batch
+        email_queue.put(request.email, verification_code, purpose="verification")
         
         return RegisterResponse(
             success=True,
@@ -378,56 +800,68 @@ async def resend_verification_code(request: VerificationCodeRequest):
             message="Doğrulama kodu gönderilirken bir hata oluştu."
         )
 
-@router.post("/login", response_model=UserSessionResponse)
-async def login_user(request: LoginRequest):
+@router.post("/login", response_model=UserSessionResponse, openapi_extra=json_body_openapi(LoginRequest))
+async def login_user(request: LoginRequest = Depends(json_body(LoginRequest)),
+                     db: Database = Depends(get_db)):
     """User login"""
-    db = Database()
-    
     try:
-        # Get user data
-        conn = db.get_connection()
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute("""
-                SELECT id, email, password_hash, first_name, last_name, phone, telegram_id,
-                       is_active, is_email_verified, created_at
-                FROM users WHERE email = %s AND is_active = true
-            """, (request.email,))
-            result = cursor.fetchone()
+        # Authenticate with just the columns the password check needs
+        credentials = await asyncio.to_thread(
+            db.fetch_one_prepared,
+            "auth_login_credentials", ("text",),
+            "SELECT id, password_hash FROM users WHERE lower(email) = lower($1) AND is_active",
+            (request.email,)
+        )
         
-        if not result:
-            conn.close()
+        if not credentials:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail={"code": "AUTH_INVALID", "message": "Geçersiz email veya şifre"}
             )
         
-        user = result
-        
         # Verify password
-        if not verify_password(request.password, user['password_hash']):
-            conn.close()
+        if not await asyncio.to_thread(verify_password, request.password, credentials['password_hash']):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail={"code": "AUTH_INVALID", "message": "Geçersiz email veya şifre"}
             )
         
         # Generate JWT token
-        token = generate_jwt_token(user['id'])
-        expires_at = datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
+        token = generate_jwt_token(credentials['id'])
+        now = datetime.now(timezone.utc)
+        expires_at = now + JWT_TTL
         
-        # Update last login and create session record
-        with conn.cursor() as cursor:
-            cursor.execute(
-                "UPDATE users SET last_login = %s WHERE id = %s",
-                (datetime.now(timezone.utc), user['id'])
-            )
-            
-            cursor.execute("""
+        # Transparently upgrade legacy or outdated password hashes
+        new_hash = None
+        if password_needs_rehash(credentials['password_hash']):
+            new_hash = await asyncio.to_thread(hash_password, request.password)
+        
+        # Update last login, create the session record from the updated row and
+        # read back the profile fields for the response in one statement
+        user = await asyncio.to_thread(
+            db.fetch_one_prepared,
+            "auth_login_session", ("timestamptz", "text", "uuid", "text", "timestamptz"),
+            """
+            WITH u AS (
+                UPDATE users SET last_login = $1, password_hash = COALESCE($2, password_hash)
+                WHERE id = $3
+                RETURNING id, email, first_name, last_name, phone, telegram_id,
+                          is_active, is_email_verified, created_at
+            ), s AS (
                 INSERT INTO user_sessions (user_id, session_token, expires_at)
-                VALUES (%s, %s, %s)
-            """, (user['id'], token, expires_at))
-            conn.commit()
-        conn.close()
+                SELECT id, $4, $5 FROM u
+            )
+            SELECT * FROM u
+            """,
+            (now, new_hash, credentials['id'], token, expires_at)
+        )
+        
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail={"code": "AUTH_INVALID", "message": "Geçersiz email veya şifre"}
+            )
+        invalidate_user_cache(user['id'])
         
         return UserSessionResponse(
             session_token=token,
@@ -440,10 +874,10 @@ async def login_user(request: LoginRequest):
                 telegram_id=user['telegram_id'],
                 is_active=user['is_active'],
                 is_email_verified=user['is_email_verified'],
-                last_login=datetime.now(timezone.utc).isoformat(),
-                created_at=user['created_at'].isoformat()
+                last_login=now,
+                created_at=user['created_at']
             ),
-            expires_at=expires_at.isoformat()
+            expires_at=expires_at
         )
         
     except HTTPException:
@@ -455,46 +889,56 @@ async def login_user(request: LoginRequest):
             detail="Giriş sırasında bir hata oluştu"
         )
 
-@router.post("/logout")
-async def logout_user(user_id: str = Depends(get_current_user)):
-    """User logout"""
-    db = Database()
-    
+def get_bearer_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+    """Raw bearer token of the current request"""
+    return credentials.credentials
+
+def delete_session(db: Database, token: str):
+    """Delete one session row (blocking, run as a background task)"""
     try:
-        # Invalidate session
-        conn = db.get_connection()
-        with conn.cursor() as cursor:
-            cursor.execute(
-                "DELETE FROM user_sessions WHERE user_id = %s",
-                (user_id,)
-            )
-            conn.commit()
-        conn.close()
-        
-        return {"message": "Başarıyla çıkış yapıldı"}
-        
+        db.execute("DELETE FROM user_sessions WHERE session_token = %s", (token,))
     except Exception as e:
         logger.error(f"Logout error: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Çıkış sırasında bir hata oluştu"
-        )
+
+@router.post("/logout")
+async def logout_user(background_tasks: BackgroundTasks, user_id: str = Depends(get_current_user),
+                      token: str = Depends(get_bearer_token), db: Database = Depends(get_db)):
+    """User logout"""
+    # Invalidate only this device's session, after the response has gone out
+    forget_token(token)
+    background_tasks.add_task(delete_session, db, token)
+    return {"message": "Başarıyla çıkış yapıldı"}
+
+# Recently served /me response bodies (already serialized JSON) by user_id;
+# profile updates and logins evict the entry, other changes show up within the TTL
+USER_CACHE_TTL_SECONDS = 30
+USER_CACHE_SIZE = 10_000
+_user_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+def invalidate_user_cache(user_id) -> None:
+    """Drop a user's cached /me response"""
+    _user_cache.pop(str(user_id), None)
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(user_id: str = Depends(get_current_user)):
+async def get_current_user_info(user_id: str = Depends(get_current_user), db: Database = Depends(get_db)):
     """Get current user information"""
-    db = Database()
-    
+    hit = _user_cache.get(user_id)
+    if hit is not None:
+        if hit[1] > time.monotonic():
+            _user_cache.move_to_end(user_id)
+            return Response(content=hit[0], media_type="application/json")
+        del _user_cache[user_id]
     try:
-        conn = db.get_connection()
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute("""
-                SELECT id, email, first_name, last_name, phone, telegram_id,
-                       is_active, is_email_verified, last_login, created_at
-                FROM users WHERE id = %s AND is_active = true
-            """, (user_id,))
-            result = cursor.fetchone()
-        conn.close()
+        result = await asyncio.to_thread(
+            db.fetch_one_prepared,
+            "auth_current_user", ("uuid",),
+            """
+            SELECT id, email, first_name, last_name, phone, telegram_id,
+                   is_active, is_email_verified, last_login, created_at
+            FROM users WHERE id = $1 AND is_active = true
+            """,
+            (user_id,)
+        )
         
         if not result:
             raise HTTPException(
@@ -504,7 +948,7 @@ async def get_current_user_info(user_id: str = Depends(get_current_user)):
         
         user = result
         
-        return UserResponse(
+        response = UserResponse(
             id=user['id'],
             email=user['email'],
             first_name=user['first_name'],
@@ -513,9 +957,16 @@ async def get_current_user_info(user_id: str = Depends(get_current_user)):
             telegram_id=user['telegram_id'],
             is_active=user['is_active'],
             is_email_verified=user['is_email_verified'],
-            last_login=user['last_login'].isoformat() if user['last_login'] else None,
-            created_at=user['created_at'].isoformat()
+            last_login=user['last_login'],
+            created_at=user['created_at']
         )
+        # Serialize once in pydantic-core; cache hits and this response then
+        # skip response_model validation and re-encoding
+        body = response.model_dump_json().encode()
+        _user_cache[user_id] = (body, time.monotonic() + USER_CACHE_TTL_SECONDS)
+        if len(_user_cache) > USER_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+        return Response(content=body, media_type="application/json")
         
     except HTTPException:
         raise
@@ -527,111 +978,94 @@ async def get_current_user_info(user_id: str = Depends(get_current_user)):
         )
 
 @router.put("/me")
-async def update_current_user_info(req: UpdateProfileRequest, user_id: str = Depends(get_current_user)):
+async def update_current_user_info(req: UpdateProfileRequest, user_id: str = Depends(get_current_user),
+                                   db: Database = Depends(get_db)):
     """Update current user information"""
-    db = Database()
     try:
-        fields = []
-        values = []
-        if req.first_name is not None:
-            fields.append('first_name = %s')
-            values.append(req.first_name)
-        if req.last_name is not None:
-            fields.append('last_name = %s')
-            values.append(req.last_name)
-        if req.phone is not None:
-            fields.append('phone = %s')
-            values.append(req.phone)
-        if req.telegram_id is not None:
-            fields.append('telegram_id = %s')
-            values.append(req.telegram_id)
-        if not fields:
+        if req.first_name is None and req.last_name is None and req.phone is None and req.telegram_id is None:
             return {"success": True, "message": "Güncellenecek alan yok"}
-        values.append(user_id)
-        set_clause = ', '.join(fields)
-        conn = db.get_connection()
-        with conn.cursor() as cursor:
-            cursor.execute(f"UPDATE users SET {set_clause} WHERE id = %s", tuple(values))
-            conn.commit()
-        conn.close()
+        # Fixed statement text (omitted fields keep their value), prepared once per connection
+        await asyncio.to_thread(
+            db.fetch_one_prepared,
+            "auth_update_profile", ("text", "text", "text", "text", "uuid"),
+            """
+            UPDATE users SET
+                first_name = COALESCE($1, first_name),
+                last_name = COALESCE($2, last_name),
+                phone = COALESCE($3, phone),
+                telegram_id = COALESCE($4, telegram_id)
+            WHERE id = $5
+            """,
+            (req.first_name, req.last_name, req.phone, req.telegram_id, user_id)
+        )
+        invalidate_user_cache(user_id)
         return {"success": True, "message": "Profil güncellendi"}
     except Exception as e:
         logger.error(f"Update user error: {e}")
         raise HTTPException(status_code=500, detail="Profil güncellenemedi")
 
 @router.post("/request-password-reset")
-async def request_password_reset(req: PasswordResetRequest):
+async def request_password_reset(req: PasswordResetRequest, db: Database = Depends(get_db)):
     """Initiate password reset by verifying email+phone and issuing a verification code"""
-    db = Database()
     try:
         email_value = req.email.strip()
         if not email_value:
             raise HTTPException(status_code=400, detail="Email gerekli")
-        conn = db.get_connection()
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute("SELECT id, is_active FROM users WHERE lower(email) = lower(%s)", (email_value,))
-            user = cursor.fetchone()
+        user = await asyncio.to_thread(db.fetch_one, "SELECT id, is_active FROM users WHERE lower(email) = lower(%s)", (email_value,))
         if not user:
-            conn.close()
             if AUTH_TEST_MODE:
                 logger.info(f"Password reset request: user not found for email={email_value}")
             return {"success": False, "message": "Kullanıcı bulunamadı"}
         if not user.get('is_active'):
-            conn.close()
             if AUTH_TEST_MODE:
                 logger.info(f"Password reset request: user inactive for email={email_value}")
             return {"success": False, "message": "Hesap aktif değil. Lütfen email doğrulamasını tamamlayın."}
-        # Simple throttle: limit 1 request per 60 seconds
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute(
-                "SELECT created_at FROM email_verifications WHERE email = %s",
-                (email_value,),
-            )
-            prev = cursor.fetchone()
-        if prev and prev.get('created_at') and (datetime.now(timezone.utc) - prev['created_at']).total_seconds() < 60:
-            conn.close()
+        if code_sent_recently(email_value):
             return {"success": False, "message": "Çok sık istek yapıldı. Lütfen 1 dakika sonra tekrar deneyin."}
+        # The upsert only replaces a code older than the resend window, so the
+        # throttle check and the write are a single statement
         code = generate_verification_code()
-        expire_time = datetime.now(timezone.utc) + timedelta(minutes=10)
-        with conn.cursor() as cursor:
-            cursor.execute(
-                """
-                INSERT INTO email_verifications (email, verification_code, expires_at)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (email) DO UPDATE SET
-                    verification_code = EXCLUDED.verification_code,
-                    expires_at = EXCLUDED.expires_at,
-                    created_at = NOW()
-                """,
-                (email_value, code, expire_time),
-            )
-            conn.commit()
-        conn.close()
-        # Send reset email (uses SMTP outside test mode)
-        await send_verification_email(email_value, code, purpose="password_reset")
+        expire_time = datetime.now(timezone.utc) + VERIFICATION_CODE_TTL
+        issued = await asyncio.to_thread(
+            db.fetch_one,
+            """
+            INSERT INTO email_verifications (email, verification_code, expires_at)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (email) DO UPDATE SET
+                verification_code = EXCLUDED.verification_code,
+                expires_at = EXCLUDED.expires_at,
+                created_at = NOW()
+            WHERE email_verifications.created_at IS NULL
+               OR email_verifications.created_at <= NOW() - %s::interval
+            RETURNING 1
+            """,
+            (email_value, code, expire_time, CODE_RESEND_WINDOW),
+        )
+        if not issued:
+            return {"success": False, "message": "Çok sık istek yapıldı. Lütfen 1 dakika sonra tekrar deneyin."}
+        remember_code_sent(email_value)
+        # Queue the reset email (uses SMTP outside test mode)
+        email_queue.put(email_value, code, purpose="password_reset")
         return {"success": True, "message": "Doğrulama kodu gönderildi"}
     except Exception as e:
         logger.error(f"Request password reset error: {e}")
         raise HTTPException(status_code=500, detail="İşlem başarısız")
 
 @router.post("/verify-password-reset")
-async def verify_password_reset(req: PasswordResetVerifyRequest):
+async def verify_password_reset(req: PasswordResetVerifyRequest, db: Database = Depends(get_db)):
     # In test mode, accept the default code
-    if AUTH_TEST_MODE and req.verification_code == "111111":
+    if AUTH_TEST_MODE and hmac.compare_digest(req.verification_code.encode(), b"111111"):
         logger.info(f"Test mode: Accepting default verification code for {req.email}")
         return {"success": True, "message": "Doğrulandı"}
     
-    db = Database()
     try:
-        conn = db.get_connection()
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute(
-                "SELECT verification_code FROM email_verifications WHERE email = %s AND expires_at > NOW()",
-                (req.email,),
-            )
-            row = cursor.fetchone()
-        conn.close()
-        if not row or row['verification_code'] != req.verification_code:
+        # Match the code in SQL so a wrong or expired code simply returns no row
+        row = await asyncio.to_thread(
+            db.fetch_one,
+            "SELECT 1 FROM email_verifications WHERE email = %s AND verification_code = %s AND expires_at > NOW()",
+            (req.email, req.verification_code),
+        )
+        if not row:
             return {"success": False, "message": "Geçersiz doğrulama kodu"}
         return {"success": True, "message": "Doğrulandı"}
     except Exception as e:
@@ -639,21 +1073,30 @@ async def verify_password_reset(req: PasswordResetVerifyRequest):
         raise HTTPException(status_code=500, detail="İşlem başarısız")
 
 @router.post("/reset-password")
-async def reset_password(req: PasswordResetFinalizeRequest):
-    db = Database()
+async def reset_password(req: PasswordResetFinalizeRequest, db: Database = Depends(get_db)):
     try:
         # Validate new password
         pw_err = validate_password_strength(req.new_password)
         if pw_err:
             return {"success": False, "message": pw_err}
         # Hash new password
-        hashed = hash_password(req.new_password)
-        conn = db.get_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("UPDATE users SET password_hash = %s WHERE email = %s AND is_active = true", (hashed, req.email))
-            cursor.execute("DELETE FROM email_verifications WHERE email = %s", (req.email,))
-            conn.commit()
-        conn.close()
+        hashed = await asyncio.to_thread(hash_password, req.new_password)
+        # Update the hash and end the user's sessions in one round trip
+        result = await asyncio.to_thread(db.fetch_one, """
+            WITH updated AS (
+                UPDATE users SET password_hash = %s WHERE lower(email) = lower(%s) AND is_active = true
+                RETURNING id
+            ), ended_sessions AS (
+                DELETE FROM user_sessions WHERE user_id IN (SELECT id FROM updated)
+            ), used_codes AS (
+                DELETE FROM email_verifications WHERE email = %s
+            )
+            SELECT id FROM updated
+        """, (hashed, req.email, req.email))
+        if result:
+            # Tokens issued before the reset must not keep authenticating from cache
+            forget_user_tokens(result['id'])
+            invalidate_user_cache(result['id'])
         return {"success": True, "message": "Şifre güncellendi"}
     except Exception as e:
         logger.error(f"Reset password error: {e}")
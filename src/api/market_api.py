@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 from typing import List, Optional
 
@@ -22,6 +23,22 @@ class ImportRequest(BaseModel):
     end_date: Optional[datetime] = None
 
 
+# Upper bound on concurrent provider downloads per import request
+MAX_CONCURRENT_FETCHES = 8
+
+
+async def import_symbol(provider, symbol: str, start: Optional[datetime], end: Optional[datetime],
+                        semaphore: asyncio.Semaphore) -> int:
+    """Fetch one symbol's daily prices and bulk upsert them; returns rows written"""
+    # Provider calls and COPY are blocking, so both run in worker threads
+    async with semaphore:
+        df = await asyncio.to_thread(provider.fetch_daily, symbol, start=start, end=end)
+    if df.empty:
+        logger.warning(f"No data for {symbol}")
+        return 0
+    return await asyncio.to_thread(db_manager.copy_market_data, symbol, '1d', df)
+
+
 @router.post("/import-daily")
 async def import_daily_prices(req: ImportRequest, current_user = Depends(auth_service.get_current_user)):
     """Import daily OHLC prices for given symbols from a global provider and store in DB.
@@ -32,26 +49,12 @@ async def import_daily_prices(req: ImportRequest, current_user = Depends(auth_se
     """
     try:
         provider = get_provider(req.provider)
-        inserted = 0
-        for symbol in req.symbols:
-            df = provider.fetch_daily(symbol, start=req.start_date, end=req.end_date)
-            if df.empty:
-                logger.warning(f"No data for {symbol}")
-                continue
-            # Save to DB using existing schema
-            candles = []
-            for ts, row in df.iterrows():
-                candles.append({
-                    'timestamp': ts,
-                    'open': float(row['open']) if row['open'] == row['open'] else None,  # NaN-safe
-                    'high': float(row['high']) if row['high'] == row['high'] else None,
-                    'low': float(row['low']) if row['low'] == row['low'] else None,
-                    'close': float(row['close']) if row['close'] == row['close'] else None,
-                    'volume': float(row['volume']) if row['volume'] == row['volume'] else 0.0,
-                })
-            if db_manager.save_market_data(symbol, '1d', candles):
-                inserted += len(candles)
-        return {"message": "Import completed", "inserted": inserted}
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+        counts = await asyncio.gather(*(
+            import_symbol(provider, symbol, req.start_date, req.end_date, semaphore)
+            for symbol in req.symbols
+        ))
+        return {"message": "Import completed", "inserted": sum(counts)}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail={"code": "INVALID_REQUEST", "message": str(e)})
     except Exception as e:
@@ -3,13 +3,19 @@ Mobile API endpoints for React Native application
 Provides authentication, strategy management, and dashboard data APIs
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Response, status
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, EmailStr
-from typing import Optional, Dict, List, Any
+from pydantic import AfterValidator, BaseModel, EmailStr, StringConstraints
+from typing import Annotated, Optional, Dict, List, Any, Tuple
 from sqlalchemy.orm import Session
+from collections import OrderedDict
+import asyncio
+import orjson
+from types import SimpleNamespace
+import time
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
 from ..database.connection import get_db_session
 from ..user_management.user_manager import UserManager
@@ -17,16 +23,27 @@ from ..user_management.strategy_manager import StrategyManager
 from loguru import logger
 
 # Create API router
-mobile_router = APIRouter(prefix="/api/v1", tags=["Mobile API"])
+mobile_router = APIRouter(prefix="/api/v1", tags=["Mobile API"], default_response_class=ORJSONResponse)
 security = HTTPBearer()
 
+# Login/register only need a shape check on the address; the pattern runs in
+# pydantic-core instead of calling into email-validator on every request
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+
+def normalize_email_domain(email: str) -> str:
+    """Lowercase the domain part, matching EmailStr's normalization of stored addresses"""
+    local, _, domain = email.rpartition('@')
+    return f"{local}@{domain.lower()}"
+
+EmailAddress = Annotated[str, StringConstraints(pattern=EMAIL_PATTERN), AfterValidator(normalize_email_domain)]
+
 # Pydantic models for request/response
 class LoginRequest(BaseModel):
-    email: EmailStr
+    email: EmailAddress
     password: str
 
 class RegisterRequest(BaseModel):
-    email: EmailStr
+    email: EmailAddress
     password: str
     first_name: str
     last_name: str
@@ -66,6 +83,54 @@ class ApiResponse(BaseModel):
     message: str
     data: Optional[Any] = None
 
+# Handlers return ORJSONResponse directly: FastAPI then skips jsonable_encoder and
+# response_model re-validation, and orjson encodes datetime/UUID natively (UUID
+# primary keys are passed through as-is rather than str()-ed in Python).
+# The response_model declarations remain for the OpenAPI schema.
+def api_response(success: bool, message: str, data: Any = None) -> ORJSONResponse:
+    """ApiResponse-shaped JSON response"""
+    return ORJSONResponse({"success": success, "message": message, "data": data})
+
+def user_payload(user) -> Dict[str, Any]:
+    """UserResponse-shaped dict from a User row"""
+    return {
+        "id": user.id,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "phone": user.phone,
+        "telegram_id": user.telegram_id,
+        "is_active": user.is_active,
+        "is_email_verified": user.is_email_verified,
+        "last_login": user.last_login,
+        "created_at": user.created_at,
+    }
+
+# Validated session tokens -> (user snapshot, deadline), so authenticated requests
+# skip the user_sessions lookup. An entry never outlives its session's expires_at.
+# Logout evicts the token only in the worker that served it; other workers (and
+# deactivations) catch up within SESSION_CACHE_TTL_SECONDS, so keep it short.
+SESSION_CACHE_TTL_SECONDS = 15
+SESSION_CACHE_SIZE = 10_000
+SESSION_USER_FIELDS = (
+    'id', 'email', 'first_name', 'last_name', 'phone', 'telegram_id',
+    'is_active', 'is_email_verified', 'last_login', 'created_at',
+)
+_session_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+def load_session_user(db: Session, token: str) -> Optional[Tuple[SimpleNamespace, datetime]]:
+    """Validate a session token; snapshot its user (detached from the ORM session) and expiry"""
+    from ..user_management.models import UserSession
+    
+    session = db.query(UserSession).filter(UserSession.session_token == token).first()
+    if not session or not session.is_valid():
+        return None
+    user = session.user
+    if not user or not user.is_active:
+        return None
+    snapshot = SimpleNamespace(**{field: getattr(user, field) for field in SESSION_USER_FIELDS})
+    return snapshot, session.expires_at
+
 # Dependency to get current user from token
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -73,16 +138,30 @@ async def get_current_user(
 ):
     """Extract user from authorization token"""
     token = credentials.credentials
-    user_manager = UserManager(db)
-    user = user_manager.validate_session(token)
+    now = time.monotonic()
+    hit = _session_cache.get(token)
+    if hit is not None:
+        if hit[1] > now:
+            _session_cache.move_to_end(token)
+            return hit[0]
+        del _session_cache[token]
+    
+    # The ORM lookup is blocking; keep it off the event loop
+    loaded = await asyncio.to_thread(load_session_user, db, token)
     
-    if not user:
+    if not loaded:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired session token"
         )
     
-    return user
+    snapshot, expires_at = loaded
+    remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+    deadline = time.monotonic() + min(SESSION_CACHE_TTL_SECONDS, remaining)
+    _session_cache[token] = (snapshot, deadline)
+    if len(_session_cache) > SESSION_CACHE_SIZE:
+        _session_cache.popitem(last=False)
+    return snapshot
 
 # Authentication endpoints
 @mobile_router.post("/auth/login", response_model=SessionResponse)
@@ -124,22 +203,11 @@ async def login(
         # Refresh to get user relationship
         db.refresh(session)
         
-        return SessionResponse(
-            session_token=session.session_token,
-            user=UserResponse(
-                id=str(user.id),
-                email=user.email,
-                first_name=user.first_name,
-                last_name=user.last_name,
-                phone=user.phone,
-                telegram_id=user.telegram_id,
-                is_active=user.is_active,
-                is_email_verified=user.is_email_verified,
-                last_login=user.last_login,
-                created_at=user.created_at
-            ),
-            expires_at=session.expires_at
-        )
+        return ORJSONResponse({
+            "session_token": session.session_token,
+            "user": user_payload(user),
+            "expires_at": session.expires_at
+        })
         
     except HTTPException:
         raise
@@ -171,7 +239,7 @@ async def register(
             # Check if user already exists
             existing_user = db.query(User).filter(User.email == register_data.email).first()
             if existing_user:
-                return ApiResponse(
+                return api_response(
                     success=False,
                     message="User with this email already exists"
                 )
@@ -191,13 +259,13 @@ async def register(
             db.add(user)
             db.commit()
             
-            return ApiResponse(
+            return api_response(
                 success=True,
                 message="User registered successfully (test mode - auto-verified)"
             )
         
         # For production mode (not implemented yet)
-        return ApiResponse(
+        return api_response(
             success=False,
             message="Registration not implemented for production mode"
         )
@@ -220,10 +288,11 @@ async def logout(
     """User logout endpoint"""
     try:
         token = credentials.credentials
+        _session_cache.pop(token, None)
         user_manager = UserManager(db)
         success = user_manager.logout_user(token)
         
-        return ApiResponse(
+        return api_response(
             success=success,
             message="Logged out successfully" if success else "Logout failed"
         )
@@ -239,18 +308,7 @@ async def get_current_user_info(
     current_user = Depends(get_current_user)
 ):
     """Get current user information"""
-    return UserResponse(
-        id=str(current_user.id),
-        email=current_user.email,
-        first_name=current_user.first_name,
-        last_name=current_user.last_name,
-        phone=current_user.phone,
-        telegram_id=current_user.telegram_id,
-        is_active=current_user.is_active,
-        is_email_verified=current_user.is_email_verified,
-        last_login=current_user.last_login,
-        created_at=current_user.created_at
-    )
+    return ORJSONResponse(user_payload(current_user))
 
 # Password reset endpoints
 class PasswordResetRequest(BaseModel):
@@ -276,13 +334,13 @@ async def request_password_reset(
         AUTH_TEST_MODE = os.getenv("AUTH_TEST_MODE", "false").lower() == "true"
         
         if AUTH_TEST_MODE:
-            return ApiResponse(
+            return api_response(
                 success=True,
                 message="If the email exists, a password reset code has been sent. Use code 111111 for test mode."
             )
         
         # For production mode (not implemented yet)
-        return ApiResponse(
+        return api_response(
             success=False,
             message="Password reset not implemented for production mode"
         )
@@ -305,13 +363,13 @@ async def verify_password_reset(
         AUTH_TEST_MODE = os.getenv("AUTH_TEST_MODE", "false").lower() == "true"
         
         if AUTH_TEST_MODE and request.verification_code == "111111":
-            return ApiResponse(
+            return api_response(
                 success=True,
                 message="Verification code accepted (test mode)"
             )
         
         # For production, validate against actual token (not implemented yet)
-        return ApiResponse(
+        return api_response(
             success=False,
             message="Password reset verification not implemented"
         )
@@ -334,14 +392,14 @@ async def reset_password(
         
         user = db.query(User).filter(User.email == request.email).first()
         if not user:
-            return ApiResponse(
+            return api_response(
                 success=False,
                 message="User not found"
             )
         
         # Validate new password
         if len(request.new_password) < 8:
-            return ApiResponse(
+            return api_response(
                 success=False,
                 message="Password must be at least 8 characters long"
             )
@@ -352,7 +410,7 @@ async def reset_password(
         user.password_reset_expires = None
         db.commit()
         
-        return ApiResponse(
+        return api_response(
             success=True,
             message="Password reset successful"
         )
@@ -380,7 +438,7 @@ async def verify_email(
         
         user = db.query(User).filter(User.email == request.email).first()
         if not user:
-            return ApiResponse(
+            return api_response(
                 success=False,
                 message="User not found"
             )
@@ -396,12 +454,12 @@ async def verify_email(
             user.email_verification_expires = None
             db.commit()
             
-            return ApiResponse(
+            return api_response(
                 success=True,
                 message="Email verified successfully (test mode)"
             )
         
-        return ApiResponse(
+        return api_response(
             success=False,
             message="Email verification not implemented for production"
         )
@@ -425,12 +483,12 @@ async def resend_verification(
         AUTH_TEST_MODE = os.getenv("AUTH_TEST_MODE", "false").lower() == "true"
         
         if AUTH_TEST_MODE:
-            return ApiResponse(
+            return api_response(
                 success=True,
                 message="Verification code resent (use 111111 for test mode)"
             )
         
-        return ApiResponse(
+        return api_response(
             success=False,
             message="Email verification not implemented for production"
         )
@@ -468,10 +526,10 @@ async def create_strategy(
         
         logger.info(f"Strategy created successfully: {strategy_data.name} for user {current_user.id}")
         
-        return ApiResponse(
+        return api_response(
             success=True,
             message="Strategy created successfully",
-            data={"strategy_id": str(strategy.id)}
+            data={"strategy_id": strategy.id}
         )
         
     except Exception as e:
@@ -486,7 +544,7 @@ async def create_strategy(
 
 @mobile_router.post("/strategies/{strategy_id}/test", response_model=ApiResponse)
 async def test_strategy(
-    strategy_id: str,
+    strategy_id: uuid.UUID,
     test_data: TestStrategyRequest,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db_session)
@@ -497,24 +555,15 @@ async def test_strategy(
         import json
         import random
         
-        # Convert string ID to UUID and verify strategy exists
-        try:
-            strategy_uuid = uuid.UUID(strategy_id)
-        except ValueError:
-            return ApiResponse(
-                success=False,
-                message="Invalid strategy ID format"
-            )
-        
-        # Check if strategy belongs to user
+        # Check if strategy belongs to user (strategy_id was parsed as a UUID path param)
         strategy = db.query(CustomStrategy).filter(
-            CustomStrategy.id == strategy_uuid,
+            CustomStrategy.id == strategy_id,
             CustomStrategy.user_id == current_user.id,
             CustomStrategy.is_active == True
         ).first()
         
         if not strategy:
-            return ApiResponse(
+            return api_response(
                 success=False,
                 message="Strategy not found or not accessible"
             )
@@ -537,23 +586,18 @@ async def test_strategy(
                 "parameters": json.loads(strategy.strategy_config)
             }
             
-            return ApiResponse(
+            return api_response(
                 success=True,
                 message="Backtest completed successfully (test mode)",
                 data=mock_result
             )
         
         # For production mode
-        return ApiResponse(
+        return api_response(
             success=False,
             message="Backtest not implemented for production mode"
         )
         
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid strategy ID format"
-        )
     except Exception as e:
         import traceback
         logger.error(f"Strategy test error: {e}")
@@ -571,22 +615,13 @@ async def get_user_strategies(
     """Get user's strategies"""
     try:
         user_manager = UserManager(db)
-        strategies = user_manager.get_user_strategies(current_user.id)
-        
-        strategies_data = []
-        for strategy in strategies:
-            strategies_data.append({
-                "id": str(strategy.id),
-                "name": strategy.name,
-                "description": strategy.description,
-                "created_at": strategy.created_at,
-                "is_active": strategy.is_active
-            })
+        # Column rows go straight to orjson (UUID/datetime handled natively)
+        strategies = user_manager.get_user_strategies_raw(current_user.id)
         
-        return ApiResponse(
+        return api_response(
             success=True,
             message="Strategies retrieved successfully",
-            data=strategies_data
+            data=strategies
         )
         
     except Exception as e:
@@ -597,7 +632,7 @@ async def get_user_strategies(
 
 @mobile_router.post("/strategies/{strategy_id}/activate", response_model=ApiResponse)
 async def activate_strategy(
-    strategy_id: str,
+    strategy_id: uuid.UUID,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db_session)
 ):
@@ -608,16 +643,11 @@ async def activate_strategy(
         # 2. Activate the strategy in the database
         # 3. Possibly restart/update the trading engine
         
-        return ApiResponse(
+        return api_response(
             success=True,
             message="Strategy activated successfully"
         )
         
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid strategy ID format"
-        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -625,32 +655,43 @@ async def activate_strategy(
         )
 
 # Dashboard endpoints
+# Sample symbol data (this would normally be real-time data); the response body is
+# serialized once and re-stamped at most every SYMBOLS_REFRESH_SECONDS
+SAMPLE_SYMBOLS = {
+    "BTC": {
+        "price": 45000.00,
+        "signal": "BUY",
+        "indicators": {"RSI": 65.5, "MACD": 120.5, "BB_UPPER": 46000, "BB_LOWER": 44000},
+    },
+    "ETH": {
+        "price": 3200.00,
+        "signal": "NEUTRAL",
+        "indicators": {"RSI": 52.3, "MACD": -15.2, "BB_UPPER": 3250, "BB_LOWER": 3150},
+    },
+}
+SYMBOLS_REFRESH_SECONDS = 5
+_symbols_body: bytes = b""
+_symbols_expires_at = 0.0
+
 @mobile_router.get("/dashboard/symbols", response_model=ApiResponse)
 async def get_symbol_data():
     """Get current symbol data for dashboard"""
+    global _symbols_body, _symbols_expires_at
     try:
-        # This would normally fetch real-time data
-        # For now, return sample data
-        symbols_data = {
-            "BTC": {
-                "price": 45000.00,
-                "signal": "BUY",
-                "indicators": {"RSI": 65.5, "MACD": 120.5, "BB_UPPER": 46000, "BB_LOWER": 44000},
-                "timestamp": datetime.utcnow().isoformat()
-            },
-            "ETH": {
-                "price": 3200.00,
-                "signal": "NEUTRAL",
-                "indicators": {"RSI": 52.3, "MACD": -15.2, "BB_UPPER": 3250, "BB_LOWER": 3150},
-                "timestamp": datetime.utcnow().isoformat()
-            }
-        }
+        now = time.monotonic()
+        if now >= _symbols_expires_at:
+            timestamp = datetime.utcnow().isoformat()
+            _symbols_body = orjson.dumps({
+                "success": True,
+                "message": "Symbol data retrieved successfully",
+                "data": {
+                    key: {**symbol, "timestamp": timestamp}
+                    for key, symbol in SAMPLE_SYMBOLS.items()
+                }
+            })
+            _symbols_expires_at = now + SYMBOLS_REFRESH_SECONDS
         
-        return ApiResponse(
-            success=True,
-            message="Symbol data retrieved successfully",
-            data=symbols_data
-        )
+        return Response(content=_symbols_body, media_type="application/json")
         
     except Exception as e:
         raise HTTPException(
@@ -671,13 +712,13 @@ async def get_user_layout_preferences(
         
         # If no preferences exist, return empty preferences
         if not preferences:
-            return ApiResponse(
+            return api_response(
                 success=True,
                 message="No preferences found",
                 data={"asset_order": []}
             )
         
-        return ApiResponse(
+        return api_response(
             success=True,
             message="Preferences retrieved successfully",
             data={"asset_order": preferences.get("asset_order", [])}
@@ -703,7 +744,7 @@ async def save_user_layout_preferences(
             {"asset_order": preferences.asset_order}
         )
         
-        return ApiResponse(
+        return api_response(
             success=success,
             message="Preferences saved successfully" if success else "Failed to save preferences"
         )
@@ -1,7 +1,9 @@
+import orjson
 import pandas as pd
 import vectorbt as vbt
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 from loguru import logger
 from src.utils.config import StrategyConfig
 
@@ -134,9 +136,7 @@ def create_backtest_report(
             report['plots_saved'] = False
     
     report_path = output_dir / "report.json"
-    import json
-    with open(report_path, 'w') as f:
-        json.dump(report, f, indent=2)
+    report_path.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     
     logger.info(f"Backtest report saved to {report_path}")
     
@@ -269,8 +269,8 @@ class BacktestEngine:
         self.symbol = symbol
         self.strategy_type = strategy_type
         
-    def run_backtest(self, df):
-        """Run backtest on provided DataFrame"""
+    def run_backtest(self, df, output_dir: Optional[Path] = None):
+        """Run backtest on provided DataFrame; reports go to output_dir (default /app/reports/{symbol}_backtest)"""
         from src.indicators.factory import add_indicators
         from src.strategy.bb_macd_strategy import build_signals
         from src.strategy.flexible_strategy import build_flexible_signals
@@ -296,7 +296,8 @@ class BacktestEngine:
             portfolio = run_backtest(df_with_indicators, buy_signals, sell_signals, self.config)
             
             # Create report
-            output_dir = Path(f"/app/reports/{self.symbol}_backtest")
+            if output_dir is None:
+                output_dir = Path(f"/app/reports/{self.symbol}_backtest")
             report = create_backtest_report(
                 portfolio, df_with_indicators, buy_signals, sell_signals, 
                 self.config, output_dir
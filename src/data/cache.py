@@ -1,10 +1,16 @@
+import hashlib
 import os
+import time
 import pandas as pd
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 from loguru import logger
 
 
+OHLCV_CACHE_DIR = Path(".cache/ohlcv")
+
+
 class DataCache:
     def __init__(self, cache_dir: Path):
         self.cache_dir = cache_dir
@@ -23,7 +29,6 @@ class DataCache:
             return False
         
         cache_path = self.get_cache_path(symbol, timeframe)
-        import time
         file_age = time.time() - cache_path.stat().st_mtime
         return file_age < (max_age_hours * 3600)
     
@@ -60,4 +65,45 @@ class DataCache:
     def clear_all(self) -> None:
         for file in self.cache_dir.glob("*.csv"):
             file.unlink()
-        logger.info(f"Cleared all cache files from {self.cache_dir}")
\ No newline at end of file
+        logger.info(f"Cleared all cache files from {self.cache_dir}")
+
+
+async def get_or_download(
+    downloader,
+    symbol: str,
+    timeframe: str,
+    start_date: datetime,
+    end_date: datetime,
+    cache_dir: Path = OHLCV_CACHE_DIR,
+    max_age_hours: float = 1.0
+) -> pd.DataFrame:
+    """Return OHLCV data from the local cache, downloading it when missing or stale"""
+    # Callers pass end_date=now(), so key on the requested span rather than exact bounds
+    span_days = (end_date - start_date).days
+    key = hashlib.blake2b(f"{symbol}:{timeframe}:{span_days}".encode(), digest_size=8).hexdigest()
+    cache_path = cache_dir / f"{key}.pkl"
+
+    if cache_path.exists() and time.time() - cache_path.stat().st_mtime < max_age_hours * 3600:
+        try:
+            df = pd.read_pickle(cache_path)
+            logger.info(f"Loaded cached data: {len(df)} candles from {cache_path}")
+            return df
+        except Exception as e:
+            logger.error(f"Failed to load cache {cache_path}: {e}")
+
+    df = await downloader.download_ohlcv(
+        symbol=symbol,
+        timeframe=timeframe,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+    if not df.empty:
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            df.to_pickle(cache_path)
+            logger.info(f"Saved {len(df)} candles to cache: {cache_path}")
+        except Exception as e:
+            logger.error(f"Failed to save cache {cache_path}: {e}")
+
+    return df
@@ -24,7 +24,9 @@ class YahooFinanceProvider(GlobalPriceProvider):
 
     def fetch_daily(self, ticker: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
         logger.info(f"Fetching daily OHLC for {ticker} from Yahoo Finance")
-        data = self._yf.download(tickers=ticker, start=start, end=end, interval="1d", auto_adjust=False, progress=False)
+        # Ticker.history keeps its state on the Ticker object, unlike yf.download's
+        # module-level buffers, so several symbols can be fetched from threads at once
+        data = self._yf.Ticker(ticker).history(period="max", start=start, end=end, interval="1d", auto_adjust=False)
         if data is None or data.empty:
             return pd.DataFrame()
 
@@ -1,11 +1,40 @@
+import asyncio
 import ccxt
+import functools
+import numpy as np
 import pandas as pd
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime
 from typing import Optional
 from loguru import logger
 
 
+TIMEFRAME_MINUTES = {
+    '1m': 1, '3m': 3, '5m': 5, '15m': 15, '30m': 30,
+    '1h': 60, '2h': 120, '4h': 240, '6h': 360, '8h': 480,
+    '12h': 720, '1d': 1440, '1w': 10080
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_exchange_client(exchange: str):
+    """Return a shared ccxt client so HTTP keep-alive connections and loaded markets are reused"""
+    exchange_class = getattr(ccxt, exchange.lower())
+    return exchange_class({"enableRateLimit": True})
+
+
+@functools.lru_cache(maxsize=None)
+def get_exchange_lock(exchange: str) -> threading.Lock:
+    """Lock serializing calls on the shared client.
+
+    The sync ccxt client's rate limiter, its last-request timestamp and its
+    requests.Session are not thread-safe, and downloads run in worker threads
+    """
+    return threading.Lock()
+
+
 def fetch_ohlcv(
     exchange: str,
     symbol: str,
@@ -14,45 +43,40 @@ def fetch_ohlcv(
     max_retries: int = 3,
     retry_delay: float = 1.0
 ) -> pd.DataFrame:
-    # Rate limit'i CCXT tarafında da aç
-    exchange_class = getattr(ccxt, exchange.lower())
-    client = exchange_class({"enableRateLimit": True})
+    # Rate limit'i CCXT tarafında da aç (paylaşılan istemci)
+    client = get_exchange_client(exchange)
 
     retries = 0
     while retries <= max_retries:
         try:
             logger.info(f"Fetching {symbol} {timeframe} data from {exchange} (limit: {limit})")
 
-            ohlcv = client.fetch_ohlcv(symbol, timeframe, limit=limit)
+            with get_exchange_lock(exchange):
+                ohlcv = client.fetch_ohlcv(symbol, timeframe, limit=limit)
 
             # 1) Veri boş mu?
             if not ohlcv:
                 raise ValueError(f"No data returned for {symbol} {timeframe}")
 
-            # 2) Beklenen sütun sayısı var mı? (ts, o, h, l, c, v)
-            if any(len(row) < 6 for row in ohlcv):
+            # 2) Tek seferde float64 diziye çevir ve beklenen sütun sayısını kontrol et (ts, o, h, l, c, v)
+            arr = np.asarray(ohlcv, dtype=np.float64)
+            if arr.ndim != 2 or arr.shape[1] < 6:
                 raise ValueError("OHLCV rows have fewer than 6 fields")
 
-            # 3) DataFrame'e aktar ve kolonları STANDART isimlerle yaz
-            df = pd.DataFrame(
-                ohlcv,
-                columns=["timestamp", "open", "high", "low", "close", "volume"]
+            # 3) Zaman damgasını UTC'ye çevir ve indeksle
+            index = pd.DatetimeIndex(
+                pd.to_datetime(arr[:, 0].astype(np.int64), unit="ms", utc=True),
+                name="timestamp"
             )
 
-            # 4) Zaman damgasını UTC'ye çevir ve indeksle
-            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
-            df = df.set_index("timestamp", drop=True)
-
-            # 5) Tipleri düzelt
-            df = df.astype({
-                "open": "float64",
-                "high": "float64",
-                "low": "float64",
-                "close": "float64",
-                "volume": "float64"
-            })
+            # 4) DataFrame'i kolon dilimlerinden STANDART isimlerle kur (tipler zaten float64)
+            df = pd.DataFrame(
+                arr[:, 1:6],
+                index=index,
+                columns=["open", "high", "low", "close", "volume"]
+            )
 
-            # 6) Sıra, tekrar ve boşluk kontrolleri
+            # 5) Sıra, tekrar ve boşluk kontrolleri
             #    - ATR ve diğer göstergeler için zaman sırası kritik
             before = len(df)
             df = df[~df.index.duplicated(keep="last")]
@@ -63,7 +87,7 @@ def fetch_ohlcv(
             if not df.index.is_monotonic_increasing:
                 df = df.sort_index()
 
-            # 7) Temel geçerlilik
+            # 6) Temel geçerlilik
             if df.isna().any().any():
                 n = int(df.isna().sum().sum())
                 logger.warning(f"Fetched data contains {n} NaNs; indicators may drop leading rows")
@@ -105,9 +129,9 @@ def fetch_ohlcv(
 
 def validate_symbol_timeframe(exchange: str, symbol: str, timeframe: str) -> None:
     try:
-        exchange_class = getattr(ccxt, exchange.lower())
-        client = exchange_class({"enableRateLimit": True})
-        client.load_markets()
+        client = get_exchange_client(exchange)
+        with get_exchange_lock(exchange):
+            client.load_markets()
 
         if symbol not in client.markets:
             # örnek liste ver
@@ -130,26 +154,43 @@ def validate_symbol_timeframe(exchange: str, symbol: str, timeframe: str) -> Non
 class OHLCVDownloader:
     """OHLCV data downloader for cryptocurrency data"""
     
-    def __init__(self, exchange: str = "binance"):
+    def __init__(self, exchange: str = "binance", memo_size: int = 128):
         self.exchange = exchange
+        # In-process memo of recent downloads keyed by timeframe-aligned bounds
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
         
     async def download_ohlcv(self, symbol: str, timeframe: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
         """Download OHLCV data for given symbol and timeframe"""
         try:
-            logger.info(f"Downloading {symbol} {timeframe} data from {start_date} to {end_date}")
-            
             # Calculate how many candles we need based on timeframe
-            timeframe_minutes = {
-                '1m': 1, '3m': 3, '5m': 5, '15m': 15, '30m': 30,
-                '1h': 60, '2h': 120, '4h': 240, '6h': 360, '8h': 480,
-                '12h': 720, '1d': 1440, '1w': 10080
-            }
+            minutes_per_candle = TIMEFRAME_MINUTES.get(timeframe, 5)
+            
+            # Requests that fall in the same candle buckets return the same data
+            bucket_seconds = minutes_per_candle * 60
+            key = (
+                symbol,
+                timeframe,
+                int(start_date.timestamp()) // bucket_seconds,
+                int(end_date.timestamp()) // bucket_seconds,
+            )
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                logger.debug(f"Using memoized {symbol} {timeframe} data ({len(cached)} candles)")
+                # Callers may add indicator columns; hand out a shallow copy so
+                # the memoized frame stays untouched
+                return cached.copy(deep=False)
+            
+            logger.info(f"Downloading {symbol} {timeframe} data from {start_date} to {end_date}")
             
-            minutes_per_candle = timeframe_minutes.get(timeframe, 5)
             total_minutes = int((end_date - start_date).total_seconds() / 60)
             limit = min(1000, max(100, int(total_minutes / minutes_per_candle)))
             
-            df = fetch_ohlcv(
+            # ccxt's REST client is blocking; run it in a worker thread so
+            # concurrent downloads can overlap on the event loop
+            df = await asyncio.to_thread(
+                fetch_ohlcv,
                 exchange=self.exchange,
                 symbol=symbol,
                 timeframe=timeframe,
@@ -159,7 +200,11 @@ class OHLCVDownloader:
             # Return all downloaded data (no date filtering needed for backtests)
             # The fetch_ohlcv already limits the data appropriately
             
-            return df
+            self._memo[key] = df
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+            
+            return df.copy(deep=False)
             
         except Exception as e:
             logger.error(f"Failed to download OHLCV data for {symbol}: {e}")
@@ -2,18 +2,23 @@
 Database connection helper for FastAPI dependency injection
 """
 
+import asyncio
+from typing import AsyncIterator
 from sqlalchemy.orm import Session
 from .db_manager import TradingDBManager
 
 # Global database manager instance
 db_manager = TradingDBManager()
 
-def get_db_session() -> Session:
+async def get_db_session() -> AsyncIterator[Session]:
     """
     FastAPI dependency to provide database session
+    
+    Creating the Session does no I/O, so it stays on the event loop; close()
+    may roll back and return a pooled connection, so it runs in a worker thread
     """
     session = db_manager.Session()
     try:
         yield session
     finally:
-        session.close()
\ No newline at end of file
+        await asyncio.to_thread(session.close)
@@ -3,9 +3,12 @@ Database manager for trading system using PostgreSQL
 """
 
 import asyncio
+import io
 import os
+import threading
+from contextlib import closing, contextmanager
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import pandas as pd
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
@@ -13,6 +16,16 @@ from sqlalchemy.pool import QueuePool
 from loguru import logger
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import connection as PgConnection
+from psycopg2.pool import ThreadedConnectionPool
+
+
+class PreparingConnection(PgConnection):
+    """psycopg2 connection that remembers which server-side prepared statements it holds"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
 
 
 class TradingDBManager:
@@ -32,10 +45,13 @@ class TradingDBManager:
             echo=False
         )
         self.Session = sessionmaker(bind=self.engine)
+        # Raw psycopg2 pool, created on first use
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
         logger.info(f"Initialized TradingDBManager with {self.db_url}")
     
-    def get_connection(self):
-        """Get raw psycopg2 connection for async operations"""
+    def _connection_params(self) -> Dict:
+        """psycopg2 connection parameters from the environment"""
         # Parse connection info from DATABASE_URL or use environment variables
         host = os.getenv('POSTGRES_HOST', 'localhost')
         database = os.getenv('POSTGRES_DB', 'trader_db')
@@ -57,7 +73,77 @@ class TradingDBManager:
         if password:
             connection_params['password'] = password
         
-        return psycopg2.connect(**connection_params)
+        return connection_params
+    
+    def get_connection(self):
+        """Get raw psycopg2 connection for async operations"""
+        return psycopg2.connect(**self._connection_params())
+    
+    def get_pool(self) -> ThreadedConnectionPool:
+        """Get the shared psycopg2 connection pool, creating it on first use"""
+        pool = self._pool
+        if pool is None:
+            # Queries reach here from worker threads; build the pool only once
+            with self._pool_lock:
+                pool = self._pool
+                if pool is None:
+                    pool = self._pool = ThreadedConnectionPool(
+                        int(os.getenv('DB_POOL_MIN', '5')),
+                        int(os.getenv('DB_POOL_MAX', '20')),
+                        connection_factory=PreparingConnection,
+                        **self._connection_params()
+                    )
+        return pool
+    
+    @contextmanager
+    def pooled_connection(self):
+        """Check out a pooled connection; uncommitted work is rolled back on return"""
+        pool = self.get_pool()
+        conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            pool.putconn(conn)
+    
+    def close_pool(self):
+        """Close every connection held by the pool"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+    
+    def fetch_one(self, query: str, params: Union[Tuple, Dict] = ()) -> Optional[Dict]:
+        """Run a statement on a pooled connection, commit, and return the first row"""
+        with self.pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                row = cursor.fetchone() if cursor.description else None
+            conn.commit()
+        return row
+    
+    def fetch_one_prepared(self, name: str, arg_types: Tuple[str, ...], query: str,
+                           params: Tuple = ()) -> Optional[Dict]:
+        """Like fetch_one, but runs the query ($1, $2, ... placeholders) through a
+        server-side PREPARE made once per pooled connection, so Postgres skips
+        parsing and planning on repeat calls"""
+        with self.pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                if name not in conn.prepared_statements:
+                    cursor.execute(f"PREPARE {name} ({', '.join(arg_types)}) AS {query}")
+                    conn.prepared_statements.add(name)
+                cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+                row = cursor.fetchone() if cursor.description else None
+            conn.commit()
+        return row
+    
+    def execute(self, query: str, params: Union[Tuple, Dict] = ()) -> int:
+        """Run a statement on a pooled connection, commit, and return the affected row count"""
+        with self.pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                rowcount = cursor.rowcount
+            conn.commit()
+        return rowcount
     
     def save_market_data(self, symbol: str, timeframe: str, candles: List[Dict]) -> bool:
         """
@@ -103,6 +189,63 @@ class TradingDBManager:
             logger.error(f"Error saving market data: {e}")
             return False
     
+    def copy_market_data(self, symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        """
+        Bulk upsert an OHLCV frame: COPY it into a temp table, then merge with one INSERT ... ON CONFLICT
+        Args:
+            symbol: Trading symbol (e.g., 'AAPL')
+            timeframe: Timeframe (e.g., '1d')
+            df: DataFrame indexed by timestamp with open/high/low/close/volume columns
+        Returns:
+            Number of rows written (0 on error)
+        """
+        frame = df[['open', 'high', 'low', 'close', 'volume']].astype('float64')
+        frame['volume'] = frame['volume'].fillna(0.0)
+        # Prices are NOT NULL; drop incomplete candles and keep the last of any duplicate timestamps
+        frame = frame.dropna(subset=['open', 'high', 'low', 'close'])
+        frame = frame[~frame.index.duplicated(keep='last')]
+        if frame.empty:
+            return 0
+        
+        buffer = io.StringIO()
+        frame.to_csv(buffer, header=False)
+        buffer.seek(0)
+        
+        try:
+            with closing(self.get_connection()) as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        CREATE TEMP TABLE market_data_import (
+                            timestamp TIMESTAMPTZ NOT NULL,
+                            open DECIMAL(20,8) NOT NULL,
+                            high DECIMAL(20,8) NOT NULL,
+                            low DECIMAL(20,8) NOT NULL,
+                            close DECIMAL(20,8) NOT NULL,
+                            volume DECIMAL(20,8) NOT NULL
+                        ) ON COMMIT DROP;
+                    """)
+                    cursor.copy_expert("COPY market_data_import FROM STDIN WITH (FORMAT csv)", buffer)
+                    cursor.execute("""
+                        INSERT INTO market_data (symbol, timeframe, timestamp, open, high, low, close, volume)
+                        SELECT %(symbol)s, %(timeframe)s, timestamp, open, high, low, close, volume
+                        FROM market_data_import
+                        ON CONFLICT (symbol, timeframe, timestamp) 
+                        DO UPDATE SET 
+                            open = EXCLUDED.open,
+                            high = EXCLUDED.high,
+                            low = EXCLUDED.low,
+                            close = EXCLUDED.close,
+                            volume = EXCLUDED.volume;
+                    """, {'symbol': symbol, 'timeframe': timeframe})
+                    written = cursor.rowcount
+                conn.commit()
+            logger.debug(f"Copied {written} {symbol} {timeframe} candles to database")
+            return written
+            
+        except Exception as e:
+            logger.error(f"Error copying market data: {e}")
+            return 0
+    
     def save_indicators(self, symbol: str, market_data_id: int, indicators: Dict) -> bool:
         """
         Save technical indicators to database
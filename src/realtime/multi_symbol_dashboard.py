@@ -3,7 +3,6 @@ import json
 from datetime import datetime
 from typing import Dict, List
 from pathlib import Path
-import yaml
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
@@ -17,6 +16,7 @@ from loguru import logger
 from .multi_symbol_stream import MultiSymbolBinanceStream
 from .live_signals import LiveSignalGenerator, SignalType
 from ..database.db_manager import TradingDBManager
+from ..utils.config import load_symbols_config
 
 # Import mobile API router
 try:
@@ -118,9 +118,7 @@ class MultiSymbolTradingDashboard:
             self.symbols = db_symbols
             logger.info(f"Loaded {len(self.symbols)} symbols from database")
         else:
-            config_path = Path(__file__).parent.parent.parent / "config" / "symbols.yaml"
-            with open(config_path, 'r') as f:
-                self.config = yaml.safe_load(f)
+            self.config = load_symbols_config()
             self.symbols = self.config['symbols']
             # Seed DB for future runs
             try:
@@ -623,6 +621,7 @@ class MultiSymbolTradingDashboard:
             str(Path(__file__).resolve().parents[2] / "templates"),
         ] if reload else None
 
+        access_log = os.getenv("UVICORN_ACCESS_LOG", "false").lower() == "true"
         config = uvicorn.Config(
             app=self.app,
             host="0.0.0.0",
@@ -630,6 +629,10 @@ class MultiSymbolTradingDashboard:
             log_level="info",
             reload=reload,
             reload_dirs=reload_dirs,
+            # C HTTP parser; per-request access logging is opt-in
+            http="httptools",
+            ws="websockets",
+            access_log=access_log,
         )
         server = uvicorn.Server(config)
         
@@ -5,8 +5,8 @@ import pandas as pd
 from datetime import datetime, timezone
 from typing import Dict, List, Callable, Optional
 from loguru import logger
-import yaml
-from pathlib import Path
+
+from ..utils.config import load_symbols_config
 
 
 class MultiSymbolBinanceStream:
@@ -21,11 +21,7 @@ class MultiSymbolBinanceStream:
         self.is_running = False
         
         # Load symbol configuration
-        if config_path is None:
-            config_path = Path(__file__).parent.parent.parent / "config" / "symbols.yaml"
-        
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_symbols_config(str(config_path) if config_path else None)
             
         # Setup symbols from config
         for symbol_key, symbol_config in config['symbols'].items():
@@ -21,6 +21,14 @@ from ..api.auth import router as simple_auth_router
 from ..api.market_api import router as market_router
 
 
+def build_routers(app: FastAPI) -> None:
+    """Register the authentication and market data API routers on an app"""
+    app.include_router(auth_router)
+    # Also include simplified /auth endpoints used by mobile flows (email code register/verify)
+    app.include_router(simple_auth_router)
+    app.include_router(market_router)
+
+
 class WebSocketManager:
     """Manage WebSocket connections"""
     
@@ -107,10 +115,7 @@ class TradingDashboardServer:
         )
         
         # Include authentication, market data, and strategy testing routes
-        self.app.include_router(auth_router)
-        # Also include simplified /auth endpoints used by mobile flows (email code register/verify)
-        self.app.include_router(simple_auth_router)
-        self.app.include_router(market_router)
+        build_routers(self.app)
         
         logger.info(f"Trading dashboard server initialized for {symbol.upper()} {interval}")
     
@@ -1001,6 +1006,7 @@ class TradingDashboardServer:
                 str(Path(__file__).resolve().parents[2] / "src"),
                 str(Path(__file__).resolve().parents[2] / "templates"),
             ] if reload else None
+            access_log = os.getenv("UVICORN_ACCESS_LOG", "false").lower() == "true"
             config = uvicorn.Config(
                 self.app,
                 host="0.0.0.0",
@@ -1008,6 +1014,10 @@ class TradingDashboardServer:
                 log_level="info",
                 reload=reload,
                 reload_dirs=reload_dirs,
+                # C HTTP parser; per-request access logging is opt-in
+                http="httptools",
+                ws="websockets",
+                access_log=access_log,
             )
             server = uvicorn.Server(config)
             
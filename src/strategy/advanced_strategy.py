@@ -3,6 +3,7 @@ import numpy as np
 from loguru import logger
 from src.strategy.rules import bullish_cross, bearish_cross, lower_touch, upper_touch, validate_crossover_signals
 from src.utils.config import StrategyConfig
+from src.utils.jit import njit
 
 
 def build_advanced_signals(df: pd.DataFrame, cfg: StrategyConfig, strategy_type: str = "quality_over_quantity") -> tuple[pd.Series, pd.Series]:
@@ -172,6 +173,23 @@ def _build_volatility_breakout_signals(df: pd.DataFrame, cfg: StrategyConfig) ->
     return buy_signals, sell_signals
 
 
+@njit(cache=True)
+def _space_signals(signals: np.ndarray, min_gap: int) -> np.ndarray:
+    """Keep only signals that are at least min_gap bars after the previous kept signal"""
+    spaced = np.zeros(signals.shape[0], dtype=np.bool_)
+    last_idx = -min_gap
+    for i in range(signals.shape[0]):
+        if signals[i] and (i - last_idx) >= min_gap:
+            spaced[i] = True
+            last_idx = i
+    return spaced
+
+
+def warm_up_kernels() -> None:
+    """Compile the numba kernels, or load them from the on-disk cache, ahead of first use"""
+    _space_signals(np.zeros(1, dtype=np.bool_), 1)
+
+
 def _apply_advanced_filters(df: pd.DataFrame, buy_signals: pd.Series, sell_signals: pd.Series, 
                            cfg: StrategyConfig) -> tuple[pd.Series, pd.Series]:
     """Apply advanced filters to reduce false signals"""
@@ -183,20 +201,12 @@ def _apply_advanced_filters(df: pd.DataFrame, buy_signals: pd.Series, sell_signa
     
     # Time-based filter (avoid signals too close together)
     # Keep only signals that are at least 5 periods apart
-    buy_signals_filtered = pd.Series(False, index=df.index)
-    sell_signals_filtered = pd.Series(False, index=df.index)
-    
-    last_buy_idx = -10
-    last_sell_idx = -10
-    
-    for i in range(len(buy_signals)):
-        if buy_signals.iloc[i] and (i - last_buy_idx) >= 5:
-            buy_signals_filtered.iloc[i] = True
-            last_buy_idx = i
-            
-        if sell_signals.iloc[i] and (i - last_sell_idx) >= 5:
-            sell_signals_filtered.iloc[i] = True
-            last_sell_idx = i
+    buy_signals_filtered = pd.Series(
+        _space_signals(buy_signals.to_numpy(dtype=bool), 5), index=df.index
+    )
+    sell_signals_filtered = pd.Series(
+        _space_signals(sell_signals.to_numpy(dtype=bool), 5), index=df.index
+    )
     
     # EMA trend filter if enabled
     if cfg.filters.ema_trend.use and "EMA200" in df.columns:
@@ -5,7 +5,8 @@ User management service for registration, authentication, and profile management
 import json
 import uuid
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, List, Tuple
+from typing import Optional, Dict, List, Tuple, Any
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from loguru import logger
@@ -23,13 +24,26 @@ except ImportError as e:
     EMAIL_SERVICE_AVAILABLE = False
 
 
+_shared_email_service = None
+
+
+def get_email_service():
+    """Process-wide EmailService, so per-request UserManager instances don't rebuild it"""
+    global _shared_email_service
+    if _shared_email_service is None:
+        _shared_email_service = EmailService()
+    return _shared_email_service
+
+
 class UserManager:
     """Service class for user management operations"""
     
     def __init__(self, db_session: Session, email_service = None):
         self.db_session = db_session
         if EMAIL_SERVICE_AVAILABLE and email_service is None:
-            self.email_service = EmailService()
+            # Reuse one service (Jinja environment, template cache, SMTP settings)
+            # instead of re-checking template files and re-reading env per request
+            self.email_service = get_email_service()
         else:
             self.email_service = email_service
     
@@ -366,6 +380,39 @@ class UserManager:
             logger.error(f"Error getting user strategies: {e}")
             return []
     
+    def get_user_strategies_raw(self, user_id: uuid.UUID) -> List[Dict[str, Any]]:
+        """
+        Get the listing columns of the user's active strategies as plain dicts
+        
+        Selects only the columns the strategy list needs, bypassing ORM
+        hydration and the identity map.
+        
+        Args:
+            user_id: User ID
+            
+        Returns:
+            List of strategy rows (id, name, description, created_at, is_active)
+        """
+        try:
+            rows = self.db_session.execute(
+                select(
+                    CustomStrategy.id,
+                    CustomStrategy.name,
+                    CustomStrategy.description,
+                    CustomStrategy.created_at,
+                    CustomStrategy.is_active
+                ).where(
+                    CustomStrategy.user_id == user_id,
+                    CustomStrategy.is_active == True
+                )
+            ).mappings().all()
+            
+            return [dict(row) for row in rows]
+            
+        except Exception as e:
+            logger.error(f"Error getting user strategies: {e}")
+            return []
+    
     def _create_default_indicator_config(self, user_id: uuid.UUID):
         """Create default indicator configuration for new user"""
         try:
@@ -1,3 +1,4 @@
+import functools
 import os
 from pathlib import Path
 from typing import Optional, Literal
@@ -6,6 +7,10 @@ from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
 
+# libyaml C loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
 # -----------------------------
 # Indicator / Strategy Sections
 # -----------------------------
@@ -153,7 +158,7 @@ class AppConfig:
         self.strategy_path = Path(config_path)
         if self.strategy_path.exists():
             with open(self.strategy_path, "r", encoding="utf-8") as f:
-                config_data = yaml.safe_load(f) or {}
+                config_data = yaml.load(f, Loader=YAML_LOADER) or {}
                 # pydantic extra="ignore" -> eski YAML'larla da uyumlu
                 self.strategy = StrategyConfig(**config_data)
         else:
@@ -176,7 +181,7 @@ class AppConfig:
         if not new_path.exists():
             raise FileNotFoundError(f"Strategy config not found: {new_path}")
         with new_path.open("r", encoding="utf-8") as f:
-            raw = yaml.safe_load(f) or {}
+            raw = yaml.load(f, Loader=YAML_LOADER) or {}
             self.strategy = StrategyConfig(**raw)
         self.strategy_path = new_path
 
@@ -193,5 +198,17 @@ def load_strategy_config(config_path: Optional[str] = None) -> StrategyConfig:
         # Varsayılan StrategyConfig
         return StrategyConfig()
     with cfg_path.open("r", encoding="utf-8") as f:
-        raw = yaml.safe_load(f) or {}
+        raw = yaml.load(f, Loader=YAML_LOADER) or {}
         return StrategyConfig(**raw)
+
+
+@functools.lru_cache(maxsize=None)
+def load_symbols_config(config_path: Optional[str] = None) -> dict:
+    """
+    config/symbols.yaml (veya verilen dosya) içeriğini döner; süreç başına bir kez parse edilir.
+    Dönen dict paylaşılır, değiştirilmemelidir.
+    """
+    project_root = Path(__file__).parent.parent.parent
+    cfg_path = Path(config_path) if config_path else project_root / "config" / "symbols.yaml"
+    with cfg_path.open("r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=YAML_LOADER) or {}
@@ -0,0 +1,14 @@
+import asyncio
+from typing import Any, Coroutine
+
+try:
+    import uvloop
+except ImportError:  # optional; not available on Windows
+    uvloop = None
+
+
+def run(main: Coroutine) -> Any:
+    """Run a coroutine on uvloop when installed, otherwise on the default asyncio loop"""
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(main)
@@ -0,0 +1,7 @@
+try:
+    from numba import njit
+except ImportError:  # numba ships with vectorbt; fall back to plain Python without it
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
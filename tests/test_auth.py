@@ -0,0 +1,273 @@
+import base64
+import hashlib
+import time
+
+import orjson
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import auth
+from src.api.auth import (
+    ExpiredTokenError,
+    InvalidTokenError,
+    LoginRequest,
+    decode_jwt_token,
+    generate_jwt_token,
+    generate_verification_code,
+    hash_password,
+    json_body,
+    password_needs_rehash,
+    verify_password,
+)
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _make_token(payload: dict, header: dict = None) -> str:
+    """Sign an arbitrary header/payload with the module's HS256 key"""
+    header = header or {"alg": "HS256", "typ": "JWT"}
+    signing_input = f"{_b64(orjson.dumps(header))}.{_b64(orjson.dumps(payload))}".encode()
+    return f"{signing_input.decode()}.{_b64(auth._jwt_sign(signing_input))}"
+
+
+class TestJWT:
+    def test_round_trip(self):
+        token = generate_jwt_token("user-1")
+        payload = decode_jwt_token(token, require=('exp', 'user_id'))
+
+        assert payload['user_id'] == "user-1"
+        assert payload['exp'] - payload['iat'] == auth.JWT_EXPIRATION_HOURS * 3600
+
+    def test_expired_token(self):
+        token = _make_token({'user_id': "user-1", 'exp': int(time.time()) - 1})
+
+        with pytest.raises(ExpiredTokenError):
+            decode_jwt_token(token)
+
+    def test_tampered_signature(self):
+        token = generate_jwt_token("user-1")
+        head, payload, signature = token.split(".")
+        flipped = "A" if signature[0] != "A" else "B"
+
+        with pytest.raises(InvalidTokenError):
+            decode_jwt_token(f"{head}.{payload}.{flipped}{signature[1:]}")
+
+    def test_tampered_payload(self):
+        token = generate_jwt_token("user-1")
+        head, _, signature = token.split(".")
+        forged = _b64(orjson.dumps({'user_id': "admin", 'exp': int(time.time()) + 60}))
+
+        with pytest.raises(InvalidTokenError):
+            decode_jwt_token(f"{head}.{forged}.{signature}")
+
+    @pytest.mark.parametrize("alg", ["none", "HS512", "RS256"])
+    def test_foreign_alg_header(self, alg):
+        token = _make_token(
+            {'user_id': "user-1", 'exp': int(time.time()) + 60},
+            header={"alg": alg, "typ": "JWT"}
+        )
+
+        with pytest.raises(InvalidTokenError):
+            decode_jwt_token(token)
+
+    def test_missing_required_claim(self):
+        token = _make_token({'exp': int(time.time()) + 60})
+
+        assert decode_jwt_token(token)['exp'] > time.time()
+        with pytest.raises(InvalidTokenError):
+            decode_jwt_token(token, require=('exp', 'user_id'))
+
+    def test_missing_exp(self):
+        token = _make_token({'user_id': "user-1"})
+
+        with pytest.raises(InvalidTokenError):
+            decode_jwt_token(token, require=())
+
+    @pytest.mark.parametrize("token", [
+        "",
+        "abc",
+        "abc.def",
+        "a.b.c.d",
+        "!!!.???.***",
+        f"{_b64(b'not json')}.{_b64(b'{}')}.sig",
+    ])
+    def test_malformed_token(self, token):
+        with pytest.raises(InvalidTokenError):
+            decode_jwt_token(token)
+
+    def test_extra_segment(self):
+        head, payload, signature = generate_jwt_token("user-1").split(".")
+
+        with pytest.raises(InvalidTokenError):
+            decode_jwt_token(f"{head}.{payload}.x.{signature}")
+
+
+def _legacy_hash(password: str, salt: str = "a1b2c3d4") -> str:
+    return f"{salt}:{hashlib.sha256((password + salt).encode()).hexdigest()}"
+
+
+class TestLegacyPasswords:
+    def test_legacy_hash_verifies_and_needs_rehash(self):
+        hashed = _legacy_hash("Secret123")
+
+        assert verify_password("Secret123", hashed)
+        assert password_needs_rehash(hashed)
+
+    def test_wrong_password_fails(self):
+        assert not verify_password("Secret124", _legacy_hash("Secret123"))
+
+    @pytest.mark.parametrize("hashed", [
+        "",
+        "no-colon-here",
+        "salt:",
+        "salt:not-hex",
+        "salt:abc",
+        _legacy_hash("Secret123").replace(":", ""),
+    ])
+    def test_malformed_hash_returns_false(self, hashed):
+        assert verify_password("Secret123", hashed) is False
+
+
+class TestArgon2Passwords:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        auth._password_cache.clear()
+        yield
+        auth._password_cache.clear()
+
+    def test_argon2_round_trip(self):
+        hashed = hash_password("Secret123")
+
+        assert hashed.startswith("$argon2id$")
+        assert verify_password("Secret123", hashed)
+        assert not verify_password("Secret124", hashed)
+        assert not password_needs_rehash(hashed)
+
+    def test_cached_success_skips_kdf(self, monkeypatch):
+        hashed = hash_password("Secret123")
+        assert verify_password("Secret123", hashed)
+
+        class FailingHasher:
+            def verify(self, hashed, password):
+                raise AssertionError("KDF should not run on a cache hit")
+
+        monkeypatch.setattr(auth, "PASSWORD_HASHER", FailingHasher())
+        assert verify_password("Secret123", hashed)
+
+    def test_cached_success_does_not_verify_other_password(self):
+        hashed = hash_password("Secret123")
+        assert verify_password("Secret123", hashed)
+
+        assert not verify_password("Secret1234", hashed)
+        assert not verify_password("", hashed)
+
+    def test_cached_success_does_not_verify_other_hash(self):
+        hashed = hash_password("Secret123")
+        other = hash_password("Other456")
+        assert verify_password("Secret123", hashed)
+
+        assert not verify_password("Secret123", other)
+
+    def test_failures_are_not_cached(self):
+        hashed = hash_password("Secret123")
+
+        assert not verify_password("Secret124", hashed)
+        assert not auth._password_cache
+
+
+class TestVerificationCode:
+    def test_fixed_code_in_test_mode(self, monkeypatch):
+        monkeypatch.setattr(auth, "AUTH_TEST_MODE", True)
+
+        assert generate_verification_code() == "111111"
+
+    def test_codes_are_six_digits(self, monkeypatch):
+        monkeypatch.setattr(auth, "AUTH_TEST_MODE", False)
+
+        codes = [generate_verification_code() for _ in range(5000)]
+
+        assert all(len(code) == 6 and code.isdigit() for code in codes)
+        assert len(set(codes)) > 1
+
+    def test_every_digit_drawn_in_every_position(self, monkeypatch):
+        monkeypatch.setattr(auth, "AUTH_TEST_MODE", False)
+
+        codes = [generate_verification_code() for _ in range(5000)]
+
+        for position in range(6):
+            assert {code[position] for code in codes} == set("0123456789")
+
+    def test_out_of_range_draws_are_rejected(self, monkeypatch):
+        monkeypatch.setattr(auth, "AUTH_TEST_MODE", False)
+        draws = iter([auth.CODE_RANGE_LIMIT, 2**32 - 1, 42])
+        monkeypatch.setattr(auth, "_random_u32", lambda: next(draws))
+
+        assert generate_verification_code() == "000042"
+
+    def test_buffer_refills(self, monkeypatch):
+        monkeypatch.setattr(auth, "AUTH_TEST_MODE", False)
+        draws_per_buffer = auth.CODE_RANDOM_BUFFER_SIZE // 4
+
+        for _ in range(draws_per_buffer * 2 + 1):
+            assert len(generate_verification_code()) == 6
+
+
+@pytest.fixture(scope="module")
+def body_client():
+    """One route parsed by json_body and one by FastAPI's own body handling"""
+    app = FastAPI()
+
+    @app.post("/json-body")
+    async def parsed_by_json_body(request: LoginRequest = Depends(json_body(LoginRequest))):
+        return request.model_dump()
+
+    @app.post("/fastapi-body")
+    async def parsed_by_fastapi(request: LoginRequest):
+        return request.model_dump()
+
+    return TestClient(app)
+
+
+class TestJsonBody:
+    def _post_both(self, client, body: bytes):
+        headers = {"content-type": "application/json"}
+        ours = client.post("/json-body", content=body, headers=headers)
+        theirs = client.post("/fastapi-body", content=body, headers=headers)
+        return ours, theirs
+
+    def test_valid_body(self, body_client):
+        ours, theirs = self._post_both(body_client, b'{"email": " a@b.co ", "password": "Secret123"}')
+
+        assert ours.status_code == theirs.status_code == 200
+        assert ours.json() == theirs.json() == {"email": "a@b.co", "password": "Secret123"}
+
+    @pytest.mark.parametrize("body", [
+        b'{"email": ',
+        b'nul',
+        b'{"email": "a@b.co", "password": "Secret123"}x',
+        b'',
+    ], ids=["truncated", "bad-literal", "trailing-data", "empty"])
+    def test_invalid_json(self, body_client, body):
+        ours, theirs = self._post_both(body_client, body)
+
+        assert ours.status_code == theirs.status_code == 422
+        assert ours.json() == theirs.json()
+
+    def test_missing_field(self, body_client):
+        ours, theirs = self._post_both(body_client, b'{"email": "a@b.co"}')
+
+        assert ours.status_code == theirs.status_code == 422
+        assert ours.json() == theirs.json()
+        assert ours.json()["detail"][0]["loc"] == ["body", "password"]
+
+    def test_extra_field(self, body_client):
+        ours, theirs = self._post_both(
+            body_client, b'{"email": "a@b.co", "password": "Secret123", "role": "admin"}'
+        )
+
+        assert ours.status_code == theirs.status_code == 422
+        assert ours.json() == theirs.json()
+        assert ours.json()["detail"][0]["type"] == "extra_forbidden"
@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 from src.strategy.rules import lower_touch, upper_touch
 from src.strategy.bb_macd_strategy import build_signals
+from src.strategy.advanced_strategy import _space_signals
 from src.utils.config import StrategyConfig, BollingerConfig, MACDConfig, RSIConfig, ExecutionConfig
 
 
@@ -176,4 +177,18 @@ class TestBBMACDStrategy:
         buy_with_tol, sell_with_tol = build_signals(df, config_with_tol)
         
         assert buy_no_tol.sum() <= buy_with_tol.sum()
-        assert sell_no_tol.sum() <= sell_with_tol.sum()
\ No newline at end of file
+        assert sell_no_tol.sum() <= sell_with_tol.sum()
+
+class TestSignalSpacing:
+    def test_signals_closer_than_gap_are_dropped(self):
+        signals = np.array([True, True, False, False, False, True, True, False, False, False, True])
+        
+        expected = np.array([True, False, False, False, False, True, False, False, False, False, True])
+        result = _space_signals(signals, 5)
+        
+        np.testing.assert_array_equal(result, expected)
+    
+    def test_no_signals(self):
+        result = _space_signals(np.zeros(8, dtype=bool), 5)
+        
+        assert not result.any()